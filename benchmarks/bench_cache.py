@@ -0,0 +1,85 @@
+"""
+Measures the cost of `Cache` hit path depending on module attributes count
+
+Usage:
+    python benchmarks/bench_cache.py --sizes 10,100,1000,10000 > cache.json
+"""
+
+import argparse
+import json
+import platform
+import timeit
+import types
+
+from pytest_never_sleep.cache import Cache
+from pytest_never_sleep.never_sleep import FakeSleep, _true_time_sleep
+
+
+def make_module(size):
+    """
+    Parameters
+    ----------
+    size: int
+        count of attributes in module namespace
+
+    Returns
+    -------
+    module
+    """
+    module = types.ModuleType("bench_module_{}".format(size))
+    for index in range(size):
+        setattr(module, "attribute_{}".format(index), index)
+    module.sleep = _true_time_sleep
+    return module
+
+
+def legacy_hash(module):
+    """
+    Fingerprint which was used before, it's here only for comparison
+    """
+    return "{}-{}".format(id(module), hash(frozenset(dir(module))))
+
+
+def bench_size(size, number):
+    """
+    Parameters
+    ----------
+    size: int
+    number: int
+
+    Returns
+    -------
+    dict
+    """
+    module = make_module(size)
+    cache = Cache(FakeSleep().targets)
+    cache.add(module)
+    assert module in cache
+
+    hit = timeit.timeit(lambda: module in cache, number=number)
+    legacy = timeit.timeit(lambda: legacy_hash(module), number=number)
+    return {
+        "attributes": size,
+        "hit_ns": hit / number * 1e9,
+        "legacy_hit_ns": legacy / number * 1e9,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="10,100,1000,10000")
+    parser.add_argument("--number", type=int, default=2000)
+    args = parser.parse_args()
+
+    results = {
+        "python": platform.python_version(),
+        "benchmark": "cache_hit",
+        "results": [
+            bench_size(int(size), args.number) for size in args.sizes.split(",")
+        ],
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
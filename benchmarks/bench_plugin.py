@@ -0,0 +1,310 @@
+"""
+Measures overhead of the plugin on synthetic packages with different count of modules
+
+Every generated module has one of bindings: `import time`, `from time import sleep`
+or nothing. Each size is measured in separate processes, so results don't affect each other.
+
+Usage:
+    python benchmarks/bench_plugin.py --sizes 1000,10000,50000 --output plugin.json
+"""
+
+import argparse
+import importlib
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import timeit
+
+MODULES_PER_PART = 1000
+MODULE_TEMPLATES = (
+    "import time\n\n\ndef func():\n    time.sleep(0)\n",
+    "from time import sleep\n\n\ndef func():\n    sleep(0)\n",
+    "def func():\n    return None\n",
+)
+CONFTEST_TEMPLATE = """
+import importlib
+import json
+from time import perf_counter
+
+import pytest
+
+for index in range({size}):
+    importlib.import_module(
+        "{package}.part_{{}}.module_{{}}".format(index // {per_part}, index)
+    )
+
+_timings = {{}}
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_sessionstart(session):
+    start = perf_counter()
+    yield
+    _timings["sessionstart_s"] = perf_counter() - start
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtestloop(session):
+    start = perf_counter()
+    yield
+    _timings["runtestloop_s"] = perf_counter() - start
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_sessionfinish(session):
+    start = perf_counter()
+    yield
+    _timings["sessionfinish_s"] = perf_counter() - start
+    with open({output!r}, "w") as output:
+        json.dump(_timings, output)
+"""
+TEST_TEMPLATE = "def test_{index}():\n    pass\n\n\n"
+FIXTURE_VARIANTS = (
+    ("baseline", ("-p", "no:never_sleep")),
+    ("never_sleep", ()),
+    ("disable_time_sleep", ("--disable-sleep",)),
+)
+
+
+def make_package(root, package, size):
+    """
+    Parameters
+    ----------
+    root: str
+    package: str
+    size: int
+        count of generated modules
+    """
+    package_dir = os.path.join(root, package)
+    os.makedirs(package_dir)
+    open(os.path.join(package_dir, "__init__.py"), "w").close()
+    for index in range(size):
+        part_dir = os.path.join(
+            package_dir, "part_{}".format(index // MODULES_PER_PART)
+        )
+        if not os.path.exists(part_dir):
+            os.makedirs(part_dir)
+            open(os.path.join(part_dir, "__init__.py"), "w").close()
+        module_path = os.path.join(part_dir, "module_{}.py".format(index))
+        with open(module_path, "w") as module:
+            module.write(MODULE_TEMPLATES[index % len(MODULE_TEMPLATES)])
+
+
+def import_package(package, size):
+    """
+    Parameters
+    ----------
+    package: str
+    size: int
+    """
+    for index in range(size):
+        importlib.import_module(
+            "{}.part_{}.module_{}".format(package, index // MODULES_PER_PART, index)
+        )
+
+
+def timed(func):
+    """
+    Returns
+    -------
+    float
+        seconds spent by `func` call
+    """
+    return timeit.timeit(func, number=1)
+
+
+def measure_patch(package, size, number):
+    """
+    Works inside separate process, see `--measure-patch`
+
+    Parameters
+    ----------
+    package: str
+    size: int
+    number: int
+        count of calls for dispatch measurement
+
+    Returns
+    -------
+    dict
+    """
+    # pylint: disable=import-outside-toplevel
+    from pytest_never_sleep import never_sleep
+
+    import_package(package, size)
+    fake = never_sleep.FakeSleep(whitelist=(), allow_time_sleep=True)
+    result = {
+        "sys_modules": len(sys.modules),
+        "patch_s": timed(fake.patch_time_sleep),
+        "repeat_patch_s": timed(fake.patch_time_sleep),
+        "cache": fake.cache.info(),
+    }
+
+    # real sleeping is replaced by no-op, so only dispatch cost is measured
+    true_time_sleep = never_sleep._true_time_sleep  # pylint: disable=protected-access
+    never_sleep._true_time_sleep = lambda seconds: None
+    try:
+        noop = timeit.timeit(lambda: never_sleep._true_time_sleep(0), number=number)
+        allowed = timeit.timeit(lambda: fake.sleep(0), number=number)
+        fake.is_allow_time_sleep_by_default = False
+        fake.whitelist = (__name__,)
+        whitelisted = timeit.timeit(lambda: fake.sleep(0), number=number)
+    finally:
+        never_sleep._true_time_sleep = true_time_sleep
+    result.update(
+        {
+            "allowed_sleep_overhead_ns": (allowed - noop) / number * 1e9,
+            "whitelisted_sleep_overhead_ns": (whitelisted - noop) / number * 1e9,
+        }
+    )
+
+    result["unpatch_s"] = timed(fake.unpatch_time_sleep)
+    return result
+
+
+def run_python(args, cwd, env=None):
+    """
+    Returns
+    -------
+    str
+        stdout of process
+    """
+    process_env = dict(os.environ)
+    process_env["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [cwd, process_env.get("PYTHONPATH")])
+    )
+    process_env.update(env or {})
+    return subprocess.check_output(
+        [sys.executable] + list(args), cwd=cwd, env=process_env
+    ).decode("utf-8")
+
+
+def measure_fixtures(root, package, size, tests, repeat):
+    """
+    Runs pytest with generated tests with and without the plugin,
+    overhead is the difference between runs
+
+    Returns
+    -------
+    dict
+    """
+    output = os.path.join(root, "timings.json")
+    with open(os.path.join(root, "pytest.ini"), "w") as ini:
+        ini.write("[pytest]\n")
+    with open(os.path.join(root, "conftest.py"), "w") as conftest:
+        conftest.write(
+            CONFTEST_TEMPLATE.format(
+                size=size, package=package, per_part=MODULES_PER_PART, output=output
+            )
+        )
+    with open(os.path.join(root, "test_bench.py"), "w") as test_file:
+        for index in range(tests):
+            test_file.write(TEST_TEMPLATE.format(index=index))
+
+    timings = {}
+    for name, options in FIXTURE_VARIANTS:
+        runs = []
+        for _ in range(repeat):
+            run_python(
+                ["-m", "pytest", "-q", "-p", "no:cacheprovider", "test_bench.py"]
+                + list(options),
+                cwd=root,
+            )
+            with open(output) as result:
+                runs.append(json.load(result))
+        timings[name] = {key: min(run[key] for run in runs) for key in sorted(runs[0])}
+
+    baseline = timings["baseline"]
+    result = {"tests": tests, "runs": timings}
+    for name, _ in FIXTURE_VARIANTS[1:]:
+        result[name] = {
+            "sessionstart_overhead_s": (
+                timings[name]["sessionstart_s"] - baseline["sessionstart_s"]
+            ),
+            "per_test_overhead_s": (
+                timings[name]["runtestloop_s"] - baseline["runtestloop_s"]
+            )
+            / tests,
+            "sessionfinish_overhead_s": (
+                timings[name]["sessionfinish_s"] - baseline["sessionfinish_s"]
+            ),
+        }
+    return result
+
+
+def bench_size(size, args):
+    """
+    Parameters
+    ----------
+    size: int
+    args: argparse.Namespace
+
+    Returns
+    -------
+    dict
+    """
+    package = "never_sleep_bench_{}".format(size)
+    root = tempfile.mkdtemp(prefix="never_sleep_bench_", dir=args.workdir)
+    try:
+        make_package(root, package, size)
+        patch = run_python(
+            [
+                os.path.abspath(__file__),
+                "--measure-patch",
+                "--package",
+                package,
+                "--sizes",
+                str(size),
+                "--number",
+                str(args.number),
+            ],
+            cwd=root,
+        )
+        return {
+            "modules": size,
+            "patch": json.loads(patch),
+            "fixtures": measure_fixtures(root, package, size, args.tests, args.repeat),
+        }
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="1000,10000,50000")
+    parser.add_argument("--tests", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--number", type=int, default=10000)
+    parser.add_argument("--workdir", default=None)
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--package", help=argparse.SUPPRESS)
+    parser.add_argument("--measure-patch", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure_patch:
+        print(json.dumps(measure_patch(args.package, int(args.sizes), args.number)))
+        return
+
+    # pylint: disable=import-outside-toplevel
+    import pytest
+
+    results = {
+        "python": platform.python_version(),
+        "pytest": pytest.__version__,
+        "benchmark": "plugin_overhead",
+        "results": [bench_size(int(size), args) for size in args.sizes.split(",")],
+    }
+    dumped = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as output:
+            output.write(dumped)
+    else:
+        print(dumped)
+
+
+if __name__ == "__main__":
+    main()
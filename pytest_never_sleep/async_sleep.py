@@ -0,0 +1,99 @@
+import asyncio
+import contextlib
+import heapq
+
+from pytest_never_sleep.policy import DECISION_ALLOWED
+from pytest_never_sleep.targets import ASYNCIO_SLEEP
+
+# Event loop internals are needed to find the nearest timer,
+# they aren't known by pylint:
+# pylint: disable=protected-access, no-member
+
+_true_asyncio_sleep = asyncio.sleep
+
+
+class VirtualTimeEventLoop(asyncio.SelectorEventLoop):
+    """
+    Event loop with virtual clock
+
+    When there are no ready callbacks the clock jumps to the nearest scheduled timer,
+    so `asyncio.sleep`, `asyncio.wait_for` timeouts and `loop.call_later`
+    complete instantly and in the same order as with the real clock
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(VirtualTimeEventLoop, self).__init__(*args, **kwargs)
+        self._virtual_time = 0.0
+
+    def time(self):
+        """
+        Returns
+        -------
+        float
+            virtual time of the loop
+        """
+        return self._virtual_time
+
+    def advance(self, seconds):
+        """
+        Moves virtual clock forward
+
+        Parameters
+        ----------
+        seconds: int | float
+        """
+        self._virtual_time += seconds
+
+    def _run_once(self):
+        if not self._ready:
+            while self._scheduled and self._scheduled[0]._cancelled:
+                self._timer_cancelled_count -= 1
+                handle = heapq.heappop(self._scheduled)
+                handle._scheduled = False
+            if self._scheduled:
+                self._virtual_time = max(self._virtual_time, self._scheduled[0]._when)
+        super(VirtualTimeEventLoop, self)._run_once()
+
+
+@contextlib.contextmanager
+def using_virtual_time_loop():
+    """
+    Sets new `VirtualTimeEventLoop` as current event loop and closes it at the end
+
+    Returns
+    -------
+    VirtualTimeEventLoop
+    """
+    loop = VirtualTimeEventLoop()
+    asyncio.set_event_loop(loop)
+    try:
+        yield loop
+    finally:
+        asyncio.set_event_loop(None)
+        loop.close()
+
+
+async def sleep(fake_sleep, delay, *args, **kwargs):
+    """
+    Own implementation of `asyncio.sleep` with the same rules as `FakeSleep.sleep`,
+    the check happens when the coroutine is awaited.
+    `asyncio.sleep(0)` only yields to other tasks, so it's always allowed
+    like on `VirtualTimeEventLoop` which doesn't wait
+
+    Parameters
+    ----------
+    fake_sleep: pytest_never_sleep.never_sleep.FakeSleep
+    delay: int | float
+    """
+    loop = asyncio._get_running_loop()
+    if delay > 0 and not isinstance(loop, VirtualTimeEventLoop):
+        frame = fake_sleep.get_not_allowed_frame(delay)
+        if frame is not None and fake_sleep.skip_not_allowed_sleep(
+            delay, ASYNCIO_SLEEP, frame
+        ):
+            delay = 0
+        else:
+            if fake_sleep.listeners and frame is None:
+                fake_sleep.notify_call(delay, ASYNCIO_SLEEP, DECISION_ALLOWED)
+            delay = fake_sleep.scale_seconds(delay)
+    return await _true_asyncio_sleep(delay, *args, **kwargs)
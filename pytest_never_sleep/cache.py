@@ -0,0 +1,200 @@
+import weakref
+
+
+def get_target_attributes(module, targets):
+    """
+    Finds bindings of targets by identity in one pass over module namespace,
+    so aliases like `from time import sleep as _sleep` or `pause = time.sleep`
+    are found as well as `sleep`
+
+    Parameters
+    ----------
+    module
+    targets: pytest_never_sleep.targets.TargetRegistry
+
+    Returns
+    -------
+    List[Tuple[str, Callable]]
+        [("attribute_name", <object function>)]
+    """
+    try:
+        namespace = vars(module)
+    except TypeError:
+        return []
+    originals = targets.by_original
+    # copy of items is taken at once, so imports in other threads don't break the loop
+    return [
+        (name, value)
+        for name, value in tuple(namespace.items())
+        if id(value) in originals
+    ]
+
+
+class Cache(object):
+    """
+    Cache needs to avoid processing all modules in every call of fixture
+
+    Every entry keeps a cheap fingerprint of the module namespace:
+    identity and size of `module.__dict__` plus identities of bindings named as targets
+    and of found aliases, so a hit costs a few dict lookups regardless of module size
+
+    Entries are keyed by identity of module and hold it by a weak reference,
+    so an entry is evicted once its module is collected,
+    e.g. after it was removed from sys.modules
+
+    Example of data:
+        {
+            4514140160: (
+                <weakref to module 'tests'>,
+                ('sleep',),
+                (4514140240, 12, 4513420016),
+                [],
+            ),
+            4514742272: (
+                <weakref to module 'tests.helpers'>,
+                ('sleep', '_pause'),
+                (4514742352, 10, 4514533200, 4513420016),
+                [
+                    ('_pause', <built-in function sleep>)
+                ]
+            ),
+        }
+    """
+
+    def __init__(self, targets):
+        """
+        Parameters
+        ----------
+        targets: pytest_never_sleep.targets.TargetRegistry
+        """
+        self.targets = targets
+        self.data = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __contains__(self, module):
+        return self.get(module) is not None
+
+    def __len__(self):
+        return len(self.data)
+
+    def info(self):
+        """
+        Returns
+        -------
+        dict
+            size and counters of lookups for profiling
+        """
+        return {"size": len(self.data), "hits": self.hits, "misses": self.misses}
+
+    def _make_ref(self, module):
+        key = id(module)
+        data = self.data
+
+        def evict(ref):
+            # the key could be already reused by a new module
+            entry = data.get(key)
+            if entry is not None and entry[0] is ref:
+                del data[key]
+
+        try:
+            return weakref.ref(module, evict)
+        except TypeError:
+            return None
+
+    def _get_names(self, module_attrs):
+        names = self.targets.names
+        return names + tuple(name for name, _ in module_attrs if name not in names)
+
+    @staticmethod
+    def _get_module_fingerprint(module, names):
+        try:
+            namespace = vars(module)
+        except TypeError:
+            namespace = {}
+        return (id(namespace), len(namespace)) + tuple(
+            id(namespace.get(name)) for name in names
+        )
+
+    def _set(self, module, module_attrs):
+        entry = self.data.get(id(module))
+        if entry is not None and entry[0]() is module:
+            module_ref = entry[0]
+        else:
+            module_ref = self._make_ref(module)
+            if module_ref is None:
+                return  # objects without weak references aren't cached
+        # aliases are tracked by the fingerprint as well as names of targets
+        names = self._get_names(module_attrs)
+        self.data[id(module)] = (
+            module_ref,
+            names,
+            self._get_module_fingerprint(module, names),
+            module_attrs,
+        )
+
+    def add(self, module):
+        """
+        Parameters
+        ----------
+        module
+
+        Returns
+        -------
+        List[Tuple[str, Callable]]
+            [
+                ("sleep", <built-in function sleep>),
+                ("select", <built-in function select>),
+            ]
+        """
+        module_attrs = get_target_attributes(module, self.targets)
+        self._set(module, module_attrs)
+        return module_attrs
+
+    def refresh(self, module):
+        """
+        Updates fingerprint of already cached module, needs after patching
+        because `sleep` binding is replaced by the fake one
+
+        Parameters
+        ----------
+        module
+        """
+        entry = self.data.get(id(module))
+        module_attrs = entry[3] if entry is not None and entry[0]() is module else []
+        self._set(module, module_attrs)
+
+    def evict(self, module):
+        """
+        Parameters
+        ----------
+        module
+        """
+        entry = self.data.get(id(module))
+        if entry is not None and entry[0]() is module:
+            del self.data[id(module)]
+
+    def get(self, module):
+        """
+        Parameters
+        ----------
+        module
+
+        Returns
+        -------
+        Target attributes of module: Optional[List[Tuple[str, Callable]]]
+            [
+                ("sleep", <built-in function sleep>),
+                ("select", <built-in function select>),
+            ]
+        """
+        entry = self.data.get(id(module))
+        if (
+            entry is not None
+            and entry[0]() is module
+            and self._get_module_fingerprint(module, entry[1]) == entry[2]
+        ):
+            self.hits += 1
+            return entry[3]
+        self.misses += 1
+        return None
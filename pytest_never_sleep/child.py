@@ -0,0 +1,382 @@
+import atexit
+import json
+import os
+import shutil
+import sys
+import tempfile
+import uuid
+
+from pytest_never_sleep.never_sleep import FakeSleep, _true_time_perf_counter
+from pytest_never_sleep.stats import SleepStats
+
+ENV_REPORT_DIR = "NEVER_SLEEP_REPORT_DIR"
+ENV_NODEID = "NEVER_SLEEP_NODEID"
+ENV_ALLOW = "NEVER_SLEEP_ALLOW"
+ENV_WHITELIST = "NEVER_SLEEP_WHITELIST"
+ENV_FAST_FORWARD = "NEVER_SLEEP_FAST_FORWARD"
+ENV_PYTHONPATH = "PYTHONPATH"
+STARTUP_DIR = "startup"
+REPORT_SUFFIX = ".json"
+# real seconds between writes of sleeping time, not allowed calls are written at once
+WRITE_INTERVAL = 0.1
+
+# Python runs the first `sitecustomize` found in sys.path at startup,
+# the one which was shadowed by this module is run after it
+SITECUSTOMIZE = """\
+# installed by pytest-never-sleep --sleep-subprocess
+import os
+import sys
+
+_directory = os.path.dirname(os.path.abspath(__file__))
+try:
+    from pytest_never_sleep.child import install, run_shadowed_sitecustomize
+except ImportError:
+    pass
+else:
+    install()
+    run_shadowed_sitecustomize(_directory)
+"""
+
+# FakeSleep installed by `install` in this process
+_installed = []
+# active `ChildPropagation` of this process, forked children report to them
+_propagations = []
+
+
+def format_message(config, frame, target):  # pylint: disable=unused-argument
+    """
+    Message of not allowed call in child process, pytest config isn't available here
+
+    Parameters
+    ----------
+    config: None
+    frame: frame
+    target: str
+
+    Returns
+    -------
+    str
+    """
+    return (
+        "Method `{method}` uses `{target}` in child process {pid}.\n"
+        "It can lead to degradation of test runtime, please check '{path}' line {number} "
+        "and use `mock` for that peace of code."
+    ).format(
+        method=frame.f_code.co_name,
+        target=target,
+        pid=os.getpid(),
+        path=frame.f_code.co_filename,
+        number=frame.f_code.co_firstlineno,
+    )
+
+
+class ChildStats(SleepStats):
+    """
+    Stats of the child process which are written into own file of the report directory
+    while it runs, so children which are killed, e.g. by `multiprocessing.Pool.terminate`,
+    are reported too. Not allowed calls are written at once, sleeping time is written
+    not more often than every `WRITE_INTERVAL` and at exit,
+    so children which poll with sleep don't rewrite the file on every call
+    """
+
+    def __init__(self, report_dir):
+        """
+        Parameters
+        ----------
+        report_dir: str
+        """
+        super(ChildStats, self).__init__()
+        self.pid = os.getpid()
+        # pid can be reused by next children
+        self.path = os.path.join(
+            report_dir, "{}-{}".format(self.pid, uuid.uuid4().hex[:8])
+        )
+        self.last_write = None
+        self.is_dirty = False
+        atexit.register(self.flush)
+
+    def record(self, seconds):
+        super(ChildStats, self).record(seconds)
+        self.write_throttled()
+
+    def record_violation(self):
+        super(ChildStats, self).record_violation()
+        self.write()
+
+    def record_scaled(self, seconds):
+        super(ChildStats, self).record_scaled(seconds)
+        self.write_throttled()
+
+    def write_throttled(self):
+        """
+        Writes the report if the previous one was written more than `WRITE_INTERVAL` ago
+        """
+        if (
+            self.last_write is not None
+            and _true_time_perf_counter() - self.last_write < WRITE_INTERVAL
+        ):
+            self.is_dirty = True
+            return
+        self.write()
+
+    def flush(self):
+        """
+        Writes changes which were held back by `write_throttled`
+        """
+        if self.is_dirty:
+            self.write()
+
+    def write(self):
+        """
+        Forked children of the process don't write its report
+        """
+        if os.getpid() != self.pid or self.current is None:
+            return
+        self.is_dirty = False
+        self.last_write = _true_time_perf_counter()
+        try:
+            with open(self.path + ".tmp", "w") as report_file:
+                json.dump({"pid": self.pid, "stats": self.to_dict()}, report_file)
+            os.rename(self.path + ".tmp", self.path + REPORT_SUFFIX)
+        except (IOError, OSError):
+            pass  # the session has already finished
+
+
+def start_report(fake_sleep, report_dir, nodeid):
+    """
+    Attaches all sleeping of the process to the test which started it
+
+    Parameters
+    ----------
+    fake_sleep: pytest_never_sleep.never_sleep.FakeSleep
+    report_dir: str
+    nodeid: Optional[str]
+    """
+    fake_sleep.stats = ChildStats(report_dir)
+    fake_sleep.stats.start(nodeid)
+
+
+def install(environ=None):
+    """
+    Patches `time.sleep` in the child interpreter with the policy of the test
+    which started it, it's called by the injected `sitecustomize`
+
+    Parameters
+    ----------
+    environ: Optional[dict]
+
+    Returns
+    -------
+    Optional[pytest_never_sleep.never_sleep.FakeSleep]
+        None if the process wasn't started by a test
+    """
+    environ = os.environ if environ is None else environ
+    report_dir = environ.get(ENV_REPORT_DIR)
+    if not report_dir or _installed:
+        return None
+    whitelist = environ.get(ENV_WHITELIST)
+    fake_sleep = FakeSleep(
+        whitelist=tuple(whitelist.split(os.pathsep)) if whitelist else (),
+        get_message=format_message,
+        allow_time_sleep=environ.get(ENV_ALLOW) != "0",
+    )
+    if environ.get(ENV_FAST_FORWARD) == "1":
+        fake_sleep.enable_fast_forward()
+    fake_sleep.patch_time_sleep()
+    start_report(fake_sleep, report_dir, environ.get(ENV_NODEID) or None)
+    _installed.append(fake_sleep)
+    return fake_sleep
+
+
+def uninstall():
+    """
+    Returns back `time.sleep` patched by `install`,
+    e.g. when the child is pytest itself and the plugin takes control
+    """
+    while _installed:
+        _installed.pop().unpatch_time_sleep()
+
+
+def run_shadowed_sitecustomize(directory):
+    """
+    Parameters
+    ----------
+    directory: str
+        directory of injected `sitecustomize` which is skipped
+    """
+    try:
+        import importlib.util  # pylint: disable=import-outside-toplevel
+        from importlib.machinery import (  # pylint: disable=import-outside-toplevel
+            PathFinder,
+        )
+    except ImportError:  # Python 2
+        return
+    paths = [
+        path for path in sys.path if os.path.abspath(path or os.curdir) != directory
+    ]
+    spec = PathFinder.find_spec("sitecustomize", paths)
+    if spec is None or spec.loader is None:
+        return
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+
+def get_violations(report, nodeid):
+    """
+    Parameters
+    ----------
+    report: dict
+        {"pid": 120, "stats": {...}}
+    nodeid: Optional[str]
+
+    Returns
+    -------
+    int
+        count of not allowed calls of the test in the child process
+    """
+    return sum(
+        violation["calls"]
+        for violation in report["stats"]["violations"]
+        if violation["nodeid"] == nodeid
+    )
+
+
+def _after_fork_in_child():
+    for propagation in _propagations:
+        propagation.after_fork_in_child()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(  # pylint: disable=no-member
+        after_in_child=_after_fork_in_child
+    )
+
+
+class ChildPropagation(object):
+    """
+    Passes the sleep policy to child interpreters and collects their reports
+
+    `subprocess` and `multiprocessing` children with spawn start method get
+    injected `sitecustomize` through PYTHONPATH which patches `time.sleep`
+    by environment variables, forked children keep patched `time.sleep` of the parent.
+    Every child writes its stats into own file of the report directory
+    """
+
+    def __init__(self, fake_sleep, environ=None):
+        """
+        Parameters
+        ----------
+        fake_sleep: pytest_never_sleep.never_sleep.FakeSleep
+        environ: Optional[dict]
+        """
+        self.fake_sleep = fake_sleep
+        self.environ = os.environ if environ is None else environ
+        self.report_dir = None
+        self._saved_environ = {}
+        self._reports = {}  # {file name: the latest report of child}
+
+    def _set_environ(self, name, value):
+        if name not in self._saved_environ:
+            self._saved_environ[name] = self.environ.get(name)
+        self.environ[name] = value
+
+    def start(self):
+        """
+        Creates report directory with startup module and sets environment of children
+        """
+        self.report_dir = tempfile.mkdtemp(prefix="never_sleep_")
+        startup_dir = os.path.join(self.report_dir, STARTUP_DIR)
+        os.mkdir(startup_dir)
+        with open(os.path.join(startup_dir, "sitecustomize.py"), "w") as module:
+            module.write(SITECUSTOMIZE)
+        python_path = self.environ.get(ENV_PYTHONPATH)
+        self._set_environ(
+            ENV_PYTHONPATH,
+            os.pathsep.join([startup_dir, python_path]) if python_path else startup_dir,
+        )
+        self._set_environ(ENV_REPORT_DIR, self.report_dir)
+        self._set_environ(
+            ENV_WHITELIST, os.pathsep.join(self.fake_sleep.whitelist or ())
+        )
+        self._set_environ(
+            ENV_FAST_FORWARD, "1" if self.fake_sleep.fast_forward else "0"
+        )
+        self.set_test(None)
+        _propagations.append(self)
+
+    def set_test(self, nodeid):
+        """
+        Children started from now on belong to the test and follow its current policy
+
+        Parameters
+        ----------
+        nodeid: Optional[str]
+        """
+        self._set_environ(ENV_NODEID, nodeid or "")
+        self._set_environ(
+            ENV_ALLOW, "1" if self.fake_sleep.is_allow_time_sleep_by_default else "0"
+        )
+
+    def collect(self, nodeid=None):
+        """
+        Reads the latest reports of children, they are merged into stats by `stop`,
+        because running children rewrite their reports
+
+        Parameters
+        ----------
+        nodeid: Optional[str]
+
+        Returns
+        -------
+        Dict[int, int]
+            count of new not allowed calls of the test per child process
+        """
+        violations = {}
+        if self.report_dir is None:
+            return violations
+        for name in sorted(os.listdir(self.report_dir)):
+            if not name.endswith(REPORT_SUFFIX):
+                continue
+            try:
+                with open(os.path.join(self.report_dir, name)) as report_file:
+                    report = json.load(report_file)
+            except (IOError, OSError, ValueError):
+                continue
+            previous = self._reports.get(name)
+            self._reports[name] = report
+            calls = get_violations(report, nodeid)
+            if previous is not None:
+                calls -= get_violations(previous, nodeid)
+            if calls:
+                violations[report["pid"]] = calls
+        return violations
+
+    def stop(self):
+        """
+        Collects the last reports, returns back environment and removes report directory
+        """
+        if self in _propagations:
+            _propagations.remove(self)
+        self.collect()
+        for report in self._reports.values():
+            self.fake_sleep.stats.merge(report["stats"])
+        self._reports = {}
+        for name, value in self._saved_environ.items():
+            if value is None:
+                self.environ.pop(name, None)
+            else:
+                self.environ[name] = value
+        self._saved_environ = {}
+        if self.report_dir is not None:
+            shutil.rmtree(self.report_dir, ignore_errors=True)
+            self.report_dir = None
+
+    def after_fork_in_child(self):
+        """
+        Forked child keeps patched `time.sleep`, only its stats are reported separately
+        """
+        if self.report_dir is None:
+            return
+        if self in _propagations:
+            _propagations.remove(self)
+        start_report(self.fake_sleep, self.report_dir, self.fake_sleep.stats.current)
@@ -20,8 +20,27 @@ def pytest_never_sleep_whitelist():
     """
 
 
+@pytest.hookspec
+def pytest_never_sleep_targets():
+    """
+    This hook adds own blocking callables which are checked the same way as `time.sleep`,
+    only calls with positive timeout are checked.
+    Known targets: "threading.Event.wait", "threading.Condition.wait",
+    "queue.Queue.get", "select.select"
+
+    Returns
+    -------
+    Tuple[str | pytest_never_sleep.targets.Target]
+
+    Usage in conftest:
+    >>> from pytest_never_sleep.targets import Target
+    >>> def pytest_never_sleep_targets():
+    >>>     return "threading.Event.wait", Target("mylib.client.Client.poll", 1, "timeout")
+    """
+
+
 @pytest.hookspec(firstresult=True)
-def pytest_never_sleep_message_format(config, frame):
+def pytest_never_sleep_message_format(config, frame, target):
     """
     In this hook you can overwrite default message format on your own
 
@@ -41,6 +60,8 @@ def pytest_never_sleep_message_format(config, frame):
     ----------
     config: _pytest.config.Config
     frame: frame
+    target: str
+        path of called target, e.g. "time.sleep"
 
     Returns
     -------
@@ -50,3 +71,31 @@ def pytest_never_sleep_message_format(config, frame):
     >>> def pytest_never_sleep_message_format(config, frame):
     >>>     return "{}:{}".format(frame.f_code.co_filename, frame.f_code.co_firstlineno)
     """
+
+
+@pytest.hookspec
+def pytest_never_sleep_on_call(item, frame, target, seconds, decision):
+    """
+    This hook is called on every call of `time.sleep` and other targets,
+    e.g. to pass sleeping into own telemetry. Implementations are found once
+    at the start of session and after collection, without them calls don't pay
+    for the hook. The same can be done from Python by
+    `pytest_never_sleep.plugin.add_sleep_listener`
+
+    Parameters
+    ----------
+    item: Optional[_pytest.nodes.Item]
+        running test, None outside of tests
+    frame: frame
+        frame of call
+    target: str
+        path of called target, e.g. "time.sleep"
+    seconds: int | float
+        requested time
+    decision: str
+        "allowed", "denied", "fast_forward" or "audit"
+
+    Usage in conftest:
+    >>> def pytest_never_sleep_on_call(item, frame, target, seconds, decision):
+    >>>     print(item.nodeid, target, seconds, decision)
+    """
@@ -0,0 +1,124 @@
+import sys
+
+
+class PatchingLoader(object):
+    """
+    Wrapper of an origin loader which calls `on_module_loaded` right after
+    the module was executed
+    """
+
+    def __init__(self, loader, on_module_loaded):
+        """
+        Parameters
+        ----------
+        loader: importlib.abc.Loader
+        on_module_loaded: Callable
+        """
+        self.loader = loader
+        self.on_module_loaded = on_module_loaded
+
+    def create_module(self, spec):
+        """
+        Parameters
+        ----------
+        spec: importlib.machinery.ModuleSpec
+
+        Returns
+        -------
+        Optional[module]
+        """
+        create_module = getattr(self.loader, "create_module", None)
+        if create_module is None:
+            return None
+        return create_module(spec)
+
+    def exec_module(self, module):
+        """
+        Returns back the origin loader to the module and executes it
+
+        Parameters
+        ----------
+        module
+        """
+        spec = getattr(module, "__spec__", None)
+        if spec is not None and spec.loader is self:
+            spec.loader = self.loader
+        if getattr(module, "__loader__", None) is self:
+            module.__loader__ = self.loader
+        self.loader.exec_module(module)
+        self.on_module_loaded(module)
+
+    def __getattr__(self, name):
+        return getattr(self.loader, name)
+
+
+class PatchingFinder(object):
+    """
+    Meta path finder which doesn't find anything on its own,
+    it asks other finders and wraps found loader by `PatchingLoader`
+    so only newly imported modules will be processed
+
+    Works only with Python 3 import system
+    """
+
+    def __init__(self, on_module_loaded):
+        """
+        Parameters
+        ----------
+        on_module_loaded: Callable
+            will be called with the module object right after import
+        """
+        self.on_module_loaded = on_module_loaded
+        self._in_progress = set()
+
+    def install(self):
+        """
+        Puts the finder in front of all others
+        """
+        if self not in sys.meta_path:
+            sys.meta_path.insert(0, self)
+
+    def uninstall(self):
+        """
+        Removes the finder from `sys.meta_path`
+        """
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def find_spec(self, fullname, path=None, target=None):
+        """
+        Parameters
+        ----------
+        fullname: str
+        path: Optional[List[str]]
+        target: Optional[module]
+
+        Returns
+        -------
+        Optional[importlib.machinery.ModuleSpec]
+        """
+        if fullname in self._in_progress:
+            return None
+
+        self._in_progress.add(fullname)
+        try:
+            spec = self._find_origin_spec(fullname, path, target)
+        finally:
+            self._in_progress.discard(fullname)
+
+        if spec is None or not hasattr(spec.loader, "exec_module"):
+            return spec
+        spec.loader = PatchingLoader(spec.loader, self.on_module_loaded)
+        return spec
+
+    def _find_origin_spec(self, fullname, path, target):
+        for finder in list(sys.meta_path):
+            if finder is self:
+                continue
+            find_spec = getattr(finder, "find_spec", None)
+            if find_spec is None:
+                continue
+            spec = find_spec(fullname, path, target)
+            if spec is not None:
+                return spec
+        return None
@@ -0,0 +1,69 @@
+import weakref
+
+
+class PatchLedger(object):
+    """
+    Every attribute which was replaced by a fake, so unpatching replays only them
+    instead of checking all sys.modules
+
+    Owners are kept by weak references, entries of collected owners are dropped
+
+    Example of data:
+        {
+            (4513420016, 'sleep'): (<weakref to module 'time'>, 'sleep',
+                                    <built-in function sleep>, <FakeSleep>),
+        }
+    """
+
+    def __init__(self):
+        self.entries = {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _make_ref(self, owner, key):
+        entries = self.entries
+
+        def drop(_):
+            entries.pop(key, None)
+
+        try:
+            return weakref.ref(owner, drop)
+        except TypeError:
+            return lambda: owner
+
+    def patch(self, owner, name, original, fake):
+        """
+        Replaces attribute by the fake and records it
+
+        Parameters
+        ----------
+        owner: module | type
+        name: str
+        original: Callable
+        fake: Callable
+        """
+        key = (id(owner), name)
+        entry = self.entries.get(key)
+        if entry is None:
+            self.entries[key] = (self._make_ref(owner, key), name, original, fake)
+        else:
+            # keeps the first original if attribute was patched again by other fake
+            self.entries[key] = entry[:3] + (fake,)
+        setattr(owner, name, fake)
+
+    def restore(self):
+        """
+        Returns back origin attributes if they are still replaced by fakes
+        """
+        entries, self.entries = self.entries, {}
+        for owner_ref, name, original, fake in entries.values():
+            owner = owner_ref()
+            if owner is None:
+                continue
+            try:
+                current = vars(owner).get(name)
+            except TypeError:
+                current = getattr(owner, name, None)
+            if current is fake:
+                setattr(owner, name, original)
@@ -1,19 +1,76 @@
 import contextlib
+import functools
 import inspect
 import sys
+import threading
 import time
 
+from pytest_never_sleep.cache import Cache
+from pytest_never_sleep.import_hook import PatchingFinder
+from pytest_never_sleep.ledger import PatchLedger
+from pytest_never_sleep.policy import (
+    DECISION_ALLOWED,
+    DECISION_AUDIT,
+    DECISION_DENIED,
+    DECISION_FAST_FORWARD,
+    THREAD_POLICY_ALLOW,
+    THREAD_POLICY_INHERIT,
+    THREAD_POLICY_MAIN,
+    ContextPolicy,
+    _true_thread_start,
+    inheriting_thread_start,
+    is_main_thread,
+)
+from pytest_never_sleep.stats import SleepStats
+from pytest_never_sleep.targets import (
+    ASYNCIO_SLEEP,
+    DEFAULT_TARGETS,
+    TIME_SLEEP,
+    Target,
+    TargetRegistry,
+)
+from pytest_never_sleep.virtual_clock import (
+    CLOCK_TARGETS,
+    VirtualClock,
+    VirtualScheduler,
+    _true_thread_join,
+)
+from pytest_never_sleep.whitelist import Whitelist
+
+try:
+    import asyncio
+
+    from pytest_never_sleep import async_sleep
+except ImportError:  # Python 2 doesn't have asyncio
+    asyncio = async_sleep = None
+
 _true_time = time
 _true_time_sleep = time.sleep
-_real_time_sleep_ids = (id(_true_time), id(_true_time_sleep))
+_true_time_perf_counter = getattr(time, "perf_counter", time.time)
+_true_asyncio = asyncio
+_true_asyncio_sleep = getattr(asyncio, "sleep", None)
+
+try:
+    _get_frame = sys._getframe  # pylint: disable=protected-access
+except AttributeError:  # not CPython
+
+    def _get_frame(depth=0):
+        frame = inspect.currentframe().f_back
+        for _ in range(depth):
+            frame = frame.f_back
+        return frame
 
 
 TARGET_MODULE_NAME = "time"
 TARGET_METHOD_NAME = "sleep"
 TARGET_NAME = "{}.{}".format(TARGET_MODULE_NAME, TARGET_METHOD_NAME)
+ASYNCIO_MODULE_NAME = "asyncio"
 LIMIT_STACK_INSPECTION = 5
+DURATION_UNITS = (("ms", 0.001), ("s", 1.0), ("m", 60.0))
+PLUGIN_MODULES = (__name__, "pytest_never_sleep.async_sleep")
 DEFAULT_IGNORE_LIST = (
     TARGET_MODULE_NAME,
+    ASYNCIO_MODULE_NAME,
     "pytest_never_sleep",
     "py",
     "pytest",
@@ -30,6 +87,12 @@ class TimeSleepUsageError(RuntimeError):
     """
 
 
+class SleepBudgetError(TimeSleepUsageError):
+    """
+    The error which raises when test spent in `time.sleep` more than its budget
+    """
+
+
 @contextlib.contextmanager
 def using_real_time_sleep(fake_sleep):
     """
@@ -39,12 +102,11 @@ def using_real_time_sleep(fake_sleep):
     ----------
     fake_sleep: FakeSleep
     """
-    old_value = fake_sleep.is_allow_time_sleep_by_default
-    fake_sleep.is_allow_time_sleep_by_default = True
+    token = fake_sleep.set_policy(True)
     try:
         yield
     finally:
-        fake_sleep.is_allow_time_sleep_by_default = old_value
+        fake_sleep.reset_policy(token)
 
 
 @contextlib.contextmanager
@@ -56,12 +118,11 @@ def using_fake_time_sleep(fake_sleep):
     ----------
     fake_sleep: FakeSleep
     """
-    old_value = fake_sleep.is_allow_time_sleep_by_default
-    fake_sleep.is_allow_time_sleep_by_default = False
+    token = fake_sleep.set_policy(False)
     try:
         yield
     finally:
-        fake_sleep.is_allow_time_sleep_by_default = old_value
+        fake_sleep.reset_policy(token)
 
 
 def get_marker(request, name):
@@ -73,139 +134,135 @@ def get_marker(request, name):
     request: _pytest.fixtures.SubRequest
     name: str
 
+    Returns
+    -------
+    Optional[_pytest.mark.structures.MarkInfo | _pytest.mark.structures.Mark]
+    """
+    return get_node_marker(request.node, name)
+
+
+def get_node_marker(node, name):
+    """
+    Needs to keep compatible between different pytest versions
+
+    Parameters
+    ----------
+    node: _pytest.nodes.Node
+    name: str
+
     Returns
     -------
     Optional[_pytest.mark.structures.MarkInfo | _pytest.mark.structures.Mark]
     """
     try:
-        marker = request.node.get_marker(name)
+        marker = node.get_marker(name)
     except AttributeError:
-        marker = request.node.get_closest_marker(name)
+        marker = node.get_closest_marker(name)
     return marker
 
 
-def get_target_attributes(module):
+def parse_duration(value):
     """
     Parameters
     ----------
+    value: str | int | float
+        "50ms", "1.5s", "2m" or seconds
+
+    Returns
+    -------
+    float
+        seconds
+
+    Raises
+    ------
+    ValueError
+    """
+    if isinstance(value, (int, float)):
+        seconds = float(value)
+    else:
+        text = value.strip().lower()
+        multiplier = 1.0
+        for suffix, suffix_multiplier in DURATION_UNITS:
+            if text.endswith(suffix):
+                text, multiplier = text[: -len(suffix)], suffix_multiplier
+                break
+        seconds = float(text) * multiplier
+    if seconds < 0:
+        raise ValueError("duration must be non-negative: {!r}".format(value))
+    return seconds
+
+
+def is_target_module(mod_name, module, whitelist):
+    """
+    Parameters
+    ----------
+    mod_name: str
     module
+    whitelist: Whitelist
 
     Returns
     -------
-    Generator
-        ("attribute_name", <object function or module>)
+    bool
     """
-    for attribute_name in dir(module):
-        if attribute_name not in (TARGET_MODULE_NAME, TARGET_METHOD_NAME):
-            continue
-        try:
-            attribute_value = getattr(module, attribute_name)
-        except (ImportError, AttributeError, TypeError):
-            continue
-        yield attribute_name, attribute_value
+    if mod_name is None or module is None or mod_name == __name__:
+        return False
+    if mod_name.startswith(DEFAULT_IGNORE_LIST) or whitelist.match_module(mod_name):
+        return False
+    return True
 
 
 def get_target_sys_modules(whitelist):
     """
     Parameters
     ----------
-    whitelist: tuple[str]
+    whitelist: Whitelist
 
     Returns
     -------
     generator
     """
     for mod_name, module in dict(sys.modules).items():
-        if mod_name is None or module is None or mod_name == __name__:
-            continue
-        if mod_name.startswith(DEFAULT_IGNORE_LIST) or mod_name.startswith(whitelist):
-            continue
-        yield module
+        if is_target_module(mod_name, module, whitelist):
+            yield module
 
 
-class Cache(object):
+class CallDepth(threading.local):  # pylint: disable=too-few-public-methods
     """
-    Cache needs to avoid processing all modules in every call of fixture
-
-    Example of data:
-        {
-            'test_imports': ('4514533200--7022640807274930827', []),
-            'tests': ('4514140240--8879947260191160972', []),
-            'tests.acceptance': ('4514742544--2037579862527527209', []),
-            'tests.acceptance.diff_imports': ('4514742448--5005491873314787699', []),
-            'tests.acceptance.diff_imports.import_from_module': (
-                '4514742352--4263818908760398017',
-                [
-                    ('time', <module 'time' (built-in)>)
-                ]
-            ),
-        }
+    Depth of allowed target calls in the current thread,
+    targets which are called inside of them, e.g. `Condition.wait` by `Event.wait`, aren't checked
     """
 
-    def __init__(self):
-        self.data = {}
+    depth = 0
 
-    def __contains__(self, module):
-        return self.get(module)
 
-    @staticmethod
-    def _get_module_attributes_hash(module):
-        try:
-            attributes = dir(module)
-        except (ImportError, TypeError):
-            attributes = []
-        return "{}-{}".format(id(module), hash(frozenset(attributes)))
-
-    def _setup_module_cache(self, module):
-        date_attrs = []
-        for attribute_name, attribute_value in get_target_attributes(module):
-            if id(attribute_value) in _real_time_sleep_ids:
-                date_attrs.append((attribute_name, attribute_value))
-        return self._get_module_attributes_hash(module), date_attrs
-
-    def add(self, module):
-        """
-        Parameters
-        ----------
-        module
+class FakeAsyncSleep(object):  # pylint: disable=too-few-public-methods
+    """
+    Fake implementation of `asyncio.sleep`, follows the same rules as `FakeSleep`
+    """
 
-        Returns
-        -------
-        List[Tuple[str, Callable]]
-            [
-                ("sleep", <built-in function sleep>),
-                ("time", <module 'time' from 'time.so'>),
-            ]
-        """
-        module_hash, module_attrs = self._setup_module_cache(module)
-        self.data[module.__name__] = (module_hash, module_attrs)
-        return module_attrs
+    never_sleep_original = _true_asyncio_sleep
 
-    def get(self, module):
+    def __init__(self, fake_sleep):
         """
         Parameters
         ----------
-        module
-
-        Returns
-        -------
-        Target attributes of module: Optional[List[Tuple[str, Callable]]]
-            [
-                ("sleep", <built-in function sleep>),
-                ("time", <module 'time' from 'time.so'>),
-            ]
+        fake_sleep: FakeSleep
         """
-        module_hash, module_attrs = self.data.get(module.__name__) or ("", [])
-        if self._get_module_attributes_hash(module) == module_hash:
-            return module_attrs
-        return None
+        self.fake_sleep = fake_sleep
+
+    def __call__(self, delay, *args, **kwargs):
+        return async_sleep.sleep(self.fake_sleep, delay, *args, **kwargs)
 
 
-class FakeSleep(object):
+class FakeSleep(object):  # pylint: disable=too-many-instance-attributes
     """
     Fake implementation of `time.sleep`
     """
 
+    # pylint: disable=too-many-public-methods
+
+    never_sleep_original = _true_time_sleep
+
     def __init__(
         self,
         whitelist=None,
@@ -217,15 +274,253 @@ class FakeSleep(object):
         Parameters
         ----------
         whitelist: tuple[str]
+            module prefixes, paths or globs of files
         get_message: Callable
             pytest_never_sleep_message_format hook
         allow_time_sleep: bool
         """
+        self._whitelist = ()
+        self._decisions = {}
+        self.whitelist_matcher = None
         self.whitelist = whitelist
+        self.is_whitelist_stack = False
+        self.max_call_seconds = None
+        self.test_budget = None
+        self.scale = None
+        self.scale_floor = 0.0
+        self.item = None
+        self.listeners = []
+        self.call_depth = CallDepth()
+        self.subprocess = None
         self.get_message = get_message
+        self._policy = ContextPolicy("never_sleep_policy")
+        self._main_policy = None
         self.is_allow_time_sleep_by_default = allow_time_sleep
+        self.thread_policy = THREAD_POLICY_MAIN
         self.pytest_config = pytest_config
-        self.cache = Cache()
+        self.import_hook = None
+        self.is_patched = False
+        self.fast_forward = False
+        self.clock = VirtualClock()
+        self.scheduler = VirtualScheduler(self.clock)
+        self.stats = SleepStats()
+        self.audit = None
+        self.idle = None
+        self.scan = None
+        self.regressions = None
+        self.fake_async_sleep = FakeAsyncSleep(self)
+        self.targets = TargetRegistry()
+        self.cache = Cache(self.targets)
+        self.ledger = PatchLedger()
+        self.set_targets(DEFAULT_TARGETS)
+
+    def set_targets(self, targets):
+        """
+        Replaces registry of blocking callables which are checked by the plugin,
+        targets which can't be imported are skipped
+
+        Parameters
+        ----------
+        targets: Iterable[str | Target]
+            "threading.Event.wait" or Target("mylib.Client.poll", 1, "timeout")
+        """
+        registry = TargetRegistry()
+        for target in targets:
+            if not isinstance(target, Target):
+                target = Target(target)
+            if target.path in registry or not target.resolve():
+                continue
+            # target could be already replaced by other FakeSleep
+            target.original = getattr(
+                target.original, "never_sleep_original", target.original
+            )
+            registry.add(target, self.make_fake(target))
+        self.targets = registry
+        self.cache = Cache(registry)
+        if self.fast_forward:
+            self.add_clock_targets()
+
+    def add_clock_targets(self):
+        """
+        Registers `time` functions and `datetime.datetime` with fakes of the virtual clock,
+        so bindings like `from time import monotonic` are replaced as well as `time.sleep`
+        """
+        for path in CLOCK_TARGETS:
+            target = Target(path)
+            if path in self.targets or not target.resolve():
+                continue
+            target.original = getattr(
+                target.original, "never_sleep_original", target.original
+            )
+            self.targets.add(target, self.clock.fakes[path])
+        self.cache = Cache(self.targets)
+
+    def remove_clock_targets(self):
+        """
+        Bindings which were already replaced are returned back by `unpatch_time_sleep`
+        """
+        for path in CLOCK_TARGETS:
+            self.targets.remove(path)
+        self.cache = Cache(self.targets)
+
+    def make_fake(self, target):
+        """
+        Parameters
+        ----------
+        target: Target
+
+        Returns
+        -------
+        Callable
+            fake implementation which checks calls with timeout the same way as `time.sleep`
+        """
+        if target.path == TIME_SLEEP:
+            return self
+        if target.path == ASYNCIO_SLEEP:
+            return self.fake_async_sleep
+
+        original = target.original
+        fake_sleep = self
+        call_depth = self.call_depth
+
+        @functools.wraps(original)
+        def fake_blocking_call(*args, **kwargs):
+            seconds = target.get_timeout(args, kwargs)
+            if seconds is None or seconds <= 0 or call_depth.depth:
+                return original(*args, **kwargs)
+            frame = fake_sleep.get_not_allowed_frame(seconds)
+            if frame is not None and fake_sleep.skip_not_allowed_sleep(
+                seconds, target.path, frame
+            ):
+                # only checks state without waiting
+                args, kwargs = target.replace_timeout(args, kwargs, 0)
+                return original(*args, **kwargs)
+            if fake_sleep.listeners and frame is None:
+                fake_sleep.notify_call(seconds, target.path, DECISION_ALLOWED)
+            start = _true_time_perf_counter()
+            call_depth.depth += 1
+            try:
+                return original(*args, **kwargs)
+            finally:
+                call_depth.depth -= 1
+                fake_sleep.stats.record(_true_time_perf_counter() - start)
+                fake_sleep.check_sleep_budget()
+
+        fake_blocking_call.never_sleep_original = original
+        return fake_blocking_call
+
+    @property
+    def is_allow_time_sleep_by_default(self):
+        """
+        Policy of the current context, it's set by `using_real_time_sleep`
+        and `using_fake_time_sleep`, the session default is used if it isn't set.
+        Threads without own policy follow `thread_policy`
+
+        Returns
+        -------
+        bool
+        """
+        policy = self._policy.get()
+        if policy is not None:
+            return policy
+        if self.thread_policy != THREAD_POLICY_INHERIT and not is_main_thread():
+            if self.thread_policy == THREAD_POLICY_ALLOW:
+                return True
+            if (
+                self.thread_policy == THREAD_POLICY_MAIN
+                and self._main_policy is not None
+            ):
+                return self._main_policy
+        return self._default_policy
+
+    @is_allow_time_sleep_by_default.setter
+    def is_allow_time_sleep_by_default(self, value):
+        self._default_policy = value
+
+    def set_policy(self, allow_time_sleep):
+        """
+        Parameters
+        ----------
+        allow_time_sleep: bool
+            policy for the current context
+
+        Returns
+        -------
+        token for `reset_policy`
+        """
+        token = self._policy.set(allow_time_sleep)
+        if is_main_thread():
+            self._main_policy = allow_time_sleep
+        return token
+
+    def reset_policy(self, token):
+        """
+        Returns back the previous policy of the current context
+
+        Parameters
+        ----------
+        token:
+            result of `set_policy`
+        """
+        self._policy.reset(token)
+        if is_main_thread():
+            self._main_policy = self._policy.get()
+
+    @property
+    def whitelist(self):
+        """
+        Returns
+        -------
+        tuple[str]
+        """
+        return self._whitelist
+
+    @whitelist.setter
+    def whitelist(self, value):
+        self._whitelist = tuple(value or ())
+        self.whitelist_matcher = Whitelist(self._whitelist)
+        self._decisions = {}
+
+    def make_thread_start(self):
+        """
+        Returns
+        -------
+        Callable
+            fake implementation of `threading.Thread.start` which registers the thread
+            in the scheduler of fast forward mode and passes the policy
+            to the thread with `inherit` policy
+        """
+        fake_sleep = self
+
+        def fake_thread_start(thread):
+            if fake_sleep.fast_forward:
+                fake_sleep.scheduler.register(threading.current_thread())
+                fake_sleep.scheduler.register(thread)
+            if fake_sleep.thread_policy == THREAD_POLICY_INHERIT:
+                return inheriting_thread_start(thread)
+            return _true_thread_start(thread)
+
+        fake_thread_start.never_sleep_original = _true_thread_start
+        return fake_thread_start
+
+    def make_thread_join(self):
+        """
+        Returns
+        -------
+        Callable
+            fake implementation of `threading.Thread.join`, the joining thread
+            doesn't hold sleeping threads in fast forward mode
+        """
+        fake_sleep = self
+
+        def fake_thread_join(thread, timeout=None):
+            if not fake_sleep.fast_forward:
+                return _true_thread_join(thread, timeout)
+            with fake_sleep.scheduler.waiting():
+                return _true_thread_join(thread, timeout)
+
+        fake_thread_join.never_sleep_original = _true_thread_join
+        return fake_thread_join
 
     @staticmethod
     def get_current_frame():
@@ -234,62 +529,242 @@ class FakeSleep(object):
         -------
         frame of call
         """
-        frame = inspect.currentframe().f_back.f_back
+        frame = _get_frame(2)
         for _ in range(LIMIT_STACK_INSPECTION):
-            if frame.f_globals.get("__name__") == __name__:
+            if frame.f_globals.get("__name__") in PLUGIN_MODULES:
                 frame = frame.f_back
                 continue
             return frame
 
-    def should_use_true_sleep(self):
+    def is_whitelisted_frame(self, frame):
         """
+        Decision is cached per code object, so whitelist is checked once per call site
+
+        Parameters
+        ----------
+        frame: frame
+
         Returns
         -------
         bool
         """
-        if self.is_allow_time_sleep_by_default:
-            return True
+        code = frame.f_code
+        decision = self._decisions.get(code)
+        if decision is None:
+            decision = self._decisions[code] = self.whitelist_matcher.match(
+                frame.f_globals.get("__name__") or "", code.co_filename
+            )
+        return decision
+
+    def get_not_allowed_frame(self, seconds=None):
+        """
+        Parameters
+        ----------
+        seconds: Optional[int | float]
+            requested time, calls not longer than `max_call_seconds` are allowed
+
+        Returns
+        -------
+        Optional[frame]
+            frame of call if it isn't allowed
+        """
+        if self.is_allow_time_sleep_by_default or (
+            self.max_call_seconds is not None
+            and seconds is not None
+            and seconds <= self.max_call_seconds
+        ):
+            return None
         frame = self.get_current_frame()
-        return frame.f_globals.get("__name__", "").startswith(self.whitelist)
+        if not self._whitelist:
+            return frame
+        # only the frame of call is checked without `is_whitelist_stack`
+        outer_frame = frame
+        while outer_frame is not None:
+            if self.is_whitelisted_frame(outer_frame):
+                return None
+            outer_frame = outer_frame.f_back if self.is_whitelist_stack else None
+        return frame
+
+    def should_use_true_sleep(self):
+        """
+        Returns
+        -------
+        bool
+        """
+        return self.get_not_allowed_frame() is None
 
     def sleep(self, seconds):
         """
         Own implementation of `time.sleep` which track where it was called and raises an error if
-        this path not in the whitelist
+        this path not in the whitelist, in fast forward mode advances the virtual clock instead,
+        in audit mode only records the call site. Allowed sleeping is shortened by `scale`
 
         Parameters
         ----------
         seconds: int | float
         """
-        if not self.should_use_true_sleep():
-            frame = self.get_current_frame()
-            msg = self.get_message(config=self.pytest_config, frame=frame)
-            raise TimeSleepUsageError(msg)
+        if self.call_depth.depth:
+            # it's a part of allowed target call which is already recorded
+            _true_time_sleep(seconds)
+            return
+        frame = self.get_not_allowed_frame(seconds)
+        if frame is not None and self.skip_not_allowed_sleep(seconds, frame=frame):
+            return
+        if self.listeners and frame is None:
+            self.notify_call(seconds, TIME_SLEEP, DECISION_ALLOWED)
+        seconds = self.scale_seconds(seconds)
+        self.check_sleep_budget(seconds)
+        start = _true_time_perf_counter()
         _true_time_sleep(seconds)
+        self.stats.record(_true_time_perf_counter() - start)
 
-    def unpatch_time_sleep(self):
+    def add_listener(self, listener):
+        """
+        Parameters
+        ----------
+        listener: Callable
+            it's called on every call of targets by keywords:
+            item, frame, target, seconds and decision
+        """
+        if listener not in self.listeners:
+            self.listeners.append(listener)
+
+    def remove_listener(self, listener):
         """
-        Checks all sys.modules if it has imported `time.sleep` and it already patched
-        Will back origin `time.sleep`
+        Parameters
+        ----------
+        listener: Callable
         """
-        for module in get_target_sys_modules(self.whitelist):
-            for attribute_name, attribute_value in get_target_attributes(module):
-                if id(attribute_value) in _real_time_sleep_ids:
-                    continue
+        if listener in self.listeners:
+            self.listeners.remove(listener)
 
-                current_instance = module  # from time import sleep
-                if attribute_name == TARGET_MODULE_NAME and getattr(
-                    attribute_value, TARGET_METHOD_NAME, None
-                ):
-                    current_instance = attribute_value  # import time
+    def notify_call(self, seconds, target, decision, frame=None):
+        """
+        Passes the call to all listeners, it's called only if there are listeners
 
-                if isinstance(current_instance, FakeSleep):
-                    setattr(current_instance, TARGET_METHOD_NAME, _true_time_sleep)
+        Parameters
+        ----------
+        seconds: int | float
+            requested time
+        target: str
+            path of called target
+        decision: str
+            "allowed", "denied", "fast_forward" or "audit"
+        frame: Optional[frame]
+            frame of call, it's found if isn't passed
+        """
+        frame = frame or self.get_current_frame()
+        for listener in list(self.listeners):
+            listener(
+                item=self.item,
+                frame=frame,
+                target=target,
+                seconds=seconds,
+                decision=decision,
+            )
+
+    def scale_seconds(self, seconds):
+        """
+        Shortens allowed sleeping by `scale` factor, but not below `scale_floor`,
+        so sleeping still yields to other threads and processes.
+        Time which was scaled away is recorded to stats
+
+        Parameters
+        ----------
+        seconds: int | float
+            requested time
+
+        Returns
+        -------
+        int | float
+            time to really sleep
+        """
+        if self.scale is None or seconds <= 0:
+            return seconds
+        scaled = min(seconds, max(seconds * self.scale, self.scale_floor))
+        self.stats.record_scaled(seconds - scaled)
+        return scaled
+
+    def check_sleep_budget(self, seconds=0):
+        """
+        Parameters
+        ----------
+        seconds: int | float
+            time which is going to be spent
+
+        Raises
+        ------
+        SleepBudgetError
+            if running test spent more than `test_budget`
+        """
+        if self.test_budget is None or self.stats.current is None:
+            return
+        spent = self.stats.get_seconds(self.stats.current) + seconds
+        if spent > self.test_budget:
+            raise SleepBudgetError(
+                "Method `{}` exceeded sleep budget: {:.3f}s of {:.3f}s".format(
+                    self.stats.current, spent, self.test_budget
+                )
+            )
+
+    def skip_not_allowed_sleep(self, seconds, target=TIME_SLEEP, frame=None):
+        """
+        Handles not allowed sleeping: raises an error, records call site in audit mode
+
+        Parameters
+        ----------
+        seconds: int | float
+        target: str
+            path of called target
+        frame: Optional[frame]
+            frame of call, it's found if isn't passed
+
+        Returns
+        -------
+        bool
+            True if sleeping has to be skipped in fast forward mode
+        """
+        if not self.fast_forward or self.audit is not None:
+            frame = frame or self.get_current_frame()
+        if self.listeners:
+            if self.audit is not None:
+                decision = DECISION_AUDIT
+            elif self.fast_forward:
+                decision = DECISION_FAST_FORWARD
+            else:
+                decision = DECISION_DENIED
+            self.notify_call(seconds, target, decision, frame)
+        if self.audit is not None:
+            self.audit.record(frame, seconds, self.stats.current)
+        elif not self.fast_forward:
+            self.stats.record_violation()
+            msg = self.get_message(
+                config=self.pytest_config, frame=frame, target=target
+            )
+            raise TimeSleepUsageError(msg)
+        if self.fast_forward:
+            if seconds < 0:
+                raise ValueError("sleep length must be non-negative")
+            self.scheduler.sleep(seconds)
+            return True
+        return False
+
+    def unpatch_time_sleep(self):
+        """
+        Will back origin targets like `time.sleep` or `asyncio.sleep`
+        in all modules and classes which were patched, they are taken from the ledger,
+        so sys.modules aren't checked again
+        """
+        self.uninstall_import_hook()
+        self.disable_fast_forward()
+        self.is_patched = False
+        self.cache = Cache(self.targets)
+        self.ledger.restore()
 
     def patch_time_sleep(self):
         """
-        Checks all sys.modules if it has imported `time.sleep`
-        Will apply patch for `time.sleep`
+        Replaces all targets in modules and classes which define them
+        and checks all sys.modules if it has imported target functions, e.g. `time.sleep`
 
         For example:
         my_custome_module.py
@@ -301,19 +776,96 @@ class FakeSleep(object):
         >>> def foo():
         >>>     sleep(1)
 
-        In all cases `sleep` will equall <FakeSleep>
+        In all cases `sleep` will equall <FakeSleep>,
+        the same way `asyncio.sleep` will equall <FakeAsyncSleep>
+        and `threading.Event.wait` will be replaced by the fake function if it's registered
+
+        All targets are handled by a single pass over sys.modules.
+        With installed import hook all sys.modules are checked only once,
+        newly imported modules are patched by the hook
         """
-        for module in get_target_sys_modules(self.whitelist):
-            if module in self.cache:
-                continue
+        if self.import_hook is not None and self.is_patched:
+            return
+
+        self.targets.patch_owners(self.ledger)
+        if self.fast_forward or self.thread_policy == THREAD_POLICY_INHERIT:
+            self.ledger.patch(
+                threading.Thread, "start", _true_thread_start, self.make_thread_start()
+            )
+        if self.fast_forward:
+            self.ledger.patch(
+                threading.Thread, "join", _true_thread_join, self.make_thread_join()
+            )
+        for module in get_target_sys_modules(self.whitelist_matcher):
+            self.patch_module(module)
+        self.is_patched = True
+
+    def patch_module(self, module):
+        """
+        Applies patch for all target functions in particular module
+
+        Parameters
+        ----------
+        module
+        """
+        if module in self.cache:
+            return
+
+        module_target_attrs = self.cache.add(module)
+        for attribute_name, attribute_value in module_target_attrs:
+            self.ledger.patch(
+                module,
+                attribute_name,
+                attribute_value,
+                self.targets.get_fake(attribute_value),
+            )
+        if module_target_attrs:
+            self.cache.refresh(module)
+
+    def _on_module_imported(self, module):
+        if is_target_module(module.__name__, module, self.whitelist_matcher):
+            self.patch_module(module)
+
+    def install_import_hook(self):
+        """
+        Installs `sys.meta_path` finder which patches only newly imported modules,
+        so `patch_time_sleep` doesn't need to check all sys.modules on every call
+        """
+        if self.import_hook is None:
+            self.import_hook = PatchingFinder(self._on_module_imported)
+            self.import_hook.install()
+
+    def uninstall_import_hook(self):
+        """
+        Removes the finder from `sys.meta_path`
+        """
+        if self.import_hook is not None:
+            self.import_hook.uninstall()
+            self.import_hook = None
 
-            module_time_sleep_attrs = self.cache.add(module)
-            for attribute_name, attribute_value in module_time_sleep_attrs:
-                fake = self
-                if attribute_name == TARGET_MODULE_NAME:
-                    setattr(attribute_value, TARGET_METHOD_NAME, fake)
-                    fake = attribute_value
-                setattr(module, attribute_name, fake)
+    def enable_fast_forward(self):
+        """
+        Not allowed `time.sleep` returns immediately and advances the virtual clock,
+        which is reflected in `time.time`, `time.monotonic`, `time.perf_counter`
+        and `datetime.datetime.now`, also in modules which imported them before patching.
+        Concurrently sleeping threads are woken in order of their virtual deadlines
+        by `VirtualScheduler`. It has to be enabled before `patch_time_sleep`
+        """
+        if not self.fast_forward:
+            self.clock = VirtualClock()
+            self.scheduler = VirtualScheduler(self.clock, self.scheduler.grace)
+            self.clock.install()
+            self.fast_forward = True
+            self.add_clock_targets()
+
+    def disable_fast_forward(self):
+        """
+        Returns back the real clock
+        """
+        if self.fast_forward:
+            self.remove_clock_targets()
+        self.clock.uninstall()
+        self.fast_forward = False
 
     def __call__(self, seconds):
         self.sleep(seconds)
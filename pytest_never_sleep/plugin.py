@@ -1,21 +1,65 @@
+import sys
+
 import pytest
 
-from pytest_never_sleep import hooks
+from pytest_never_sleep import child, hooks
 from pytest_never_sleep.never_sleep import (
     TARGET_NAME,
     FakeSleep,
+    TimeSleepUsageError,
+    _true_time_perf_counter,
     get_marker,
+    get_node_marker,
+    parse_duration,
     using_fake_time_sleep,
     using_real_time_sleep,
 )
+from pytest_never_sleep.policy import (
+    THREAD_POLICIES,
+    THREAD_POLICY_INHERIT,
+    THREAD_POLICY_MAIN,
+    contextvars,
+)
+from pytest_never_sleep.report import (
+    get_relative_path,
+    get_sleep_report,
+    merge_sleep_report,
+    write_sleep_report_json,
+    write_sleep_summary,
+)
+from pytest_never_sleep.scan import CACHE_KEY, SleepScanner
+from pytest_never_sleep.stats import (
+    IdleDetector,
+    SleepAudit,
+    SleepStats,
+    find_regressions,
+)
+from pytest_never_sleep.targets import DEFAULT_TARGETS
+from pytest_never_sleep.virtual_clock import CLOCK_TARGETS, DEFAULT_GRACE
+from pytest_never_sleep.whitelist import resolve_pattern
+
+try:
+    from pytest_never_sleep.async_sleep import using_virtual_time_loop
+except ImportError:  # Python 2 doesn't have asyncio
+    using_virtual_time_loop = None
 
 _fake_time_sleep = FakeSleep()
 
 MARK_ALLOW_TIME_SLEEP = "enable_time_sleep"
 MARK_NOT_ALLOW_TIME_SLEEP = "disable_time_sleep"
+MARK_SLEEP_BUDGET = "sleep_budget"
+MARK_SLEEP_SCALE = "sleep_scale"
+XDIST_WHITELIST_KEY = "never_sleep_whitelist"
+XDIST_REPORT_KEY = "never_sleep_report"
+PROFILE_CACHE_KEY = "never_sleep/profile"
 MARKERS = {
-    MARK_ALLOW_TIME_SLEEP: "Allow using `time.sleep` in test",
-    MARK_NOT_ALLOW_TIME_SLEEP: "Not allow using `time.sleep` in test",
+    MARK_ALLOW_TIME_SLEEP: "Allow using `time.sleep` and `asyncio.sleep` in test",
+    MARK_NOT_ALLOW_TIME_SLEEP: "Not allow using `time.sleep` and `asyncio.sleep` in test",
+    MARK_SLEEP_BUDGET
+    + "(duration)": "Fail test once it really slept longer than duration, "
+    "e.g. 1 or '500ms'",
+    MARK_SLEEP_SCALE
+    + "(factor)": "Really sleep only this part of requested time, e.g. 0.05",
 }
 
 
@@ -29,6 +73,65 @@ def pytest_configure(config):
     """
     for marker, message in MARKERS.items():
         config.addinivalue_line("markers", "{}: {}".format(marker, message))
+    # pytest started by a test with --sleep-subprocess takes control from the startup module
+    child.uninstall()
+
+
+def pytest_unconfigure(config):
+    """
+    Drops collected information, so it doesn't leak into next sessions in the same process
+
+    Parameters
+    ----------
+    config: _pytest.config.Config
+    """
+    _fake_time_sleep.stats = SleepStats()
+    _fake_time_sleep.audit = None
+    _fake_time_sleep.idle = None
+    _fake_time_sleep.scan = None
+    _fake_time_sleep.regressions = None
+    _fake_time_sleep.remove_listener(config.hook.pytest_never_sleep_on_call)
+    if _fake_time_sleep.subprocess is not None:
+        _fake_time_sleep.subprocess.stop()
+        _fake_time_sleep.subprocess = None
+
+
+def add_sleep_listener(listener):
+    """
+    Python API of `pytest_never_sleep_on_call` hook
+
+    Parameters
+    ----------
+    listener: Callable
+        it's called on every call of `time.sleep` and other targets by keywords:
+        item, frame, target, seconds and decision
+    """
+    _fake_time_sleep.add_listener(listener)
+
+
+def remove_sleep_listener(listener):
+    """
+    Parameters
+    ----------
+    listener: Callable
+    """
+    _fake_time_sleep.remove_listener(listener)
+
+
+def update_call_hook(config):
+    """
+    `pytest_never_sleep_on_call` hook becomes a listener only if it has implementations,
+    so calls don't pay for the hook otherwise
+
+    Parameters
+    ----------
+    config: _pytest.config.Config
+    """
+    hook = config.hook.pytest_never_sleep_on_call
+    if hook.get_hookimpls():
+        _fake_time_sleep.add_listener(hook)
+    else:
+        _fake_time_sleep.remove_listener(hook)
 
 
 def pytest_addhooks(pluginmanager):
@@ -48,6 +151,13 @@ def pytest_addoption(parser):
     ----------
     parser: _pytest.config.Parser
     """
+    parser.addini(
+        "never_sleep_whitelist",
+        type="linelist",
+        default=[],
+        help="Allow time.sleep to these modules, paths or globs of files "
+        "relative to rootdir, e.g. tests.helpers, scripts/ or */vendor/*.py",
+    )
     group = parser.getgroup("never_sleep")
     group.addoption(
         "--disable-sleep",
@@ -60,7 +170,199 @@ def pytest_addoption(parser):
         action="append",
         default=[],
         dest="whitelist",
-        help="Allow time.sleep to these modules.",
+        help="Allow time.sleep to these modules, paths or globs of files.",
+    )
+    group.addoption(
+        "--sleep-idle-ratio",
+        action="store",
+        type=float,
+        default=None,
+        dest="sleep_idle_ratio",
+        help="Report tests which spent more than this part of wall time "
+        "neither on CPU nor in time.sleep, e.g. 0.5. It finds waits which can't be patched: "
+        "Event.wait, sockets or C extensions.",
+    )
+    group.addoption(
+        "--sleep-idle-min",
+        action="store",
+        type=parse_duration,
+        default=0.1,
+        dest="sleep_idle_min",
+        help="Don't report tests which were idle shorter than this duration, default 100ms.",
+    )
+    group.addoption(
+        "--sleep-regressions",
+        action="store_true",
+        dest="sleep_regressions",
+        help="Fail session if tests sleep longer than in previous runs, "
+        "the profile of previous runs is kept in .pytest_cache.",
+    )
+    group.addoption(
+        "--sleep-regressions-tolerance",
+        action="store",
+        type=parse_duration,
+        default=0.1,
+        dest="sleep_regressions_tolerance",
+        help="How much longer than before test can sleep, default 100ms.",
+    )
+    group.addoption(
+        "--sleep-schedule",
+        action="store_true",
+        dest="sleep_schedule",
+        help="Start tests which slept the most in previous runs first, "
+        "with pytest-xdist --dist loadgroup spread them between workers.",
+    )
+    group.addoption(
+        "--sleep-scan",
+        action="store_true",
+        dest="sleep_scan",
+        help="Find time.sleep calls which collected tests can reach by parsing test modules "
+        "and their local imports, without running them.",
+    )
+    group.addoption(
+        "--deselect-sleepers",
+        action="store_true",
+        dest="deselect_sleepers",
+        help="Deselect tests which can reach time.sleep calls found by --sleep-scan.",
+    )
+    group.addoption(
+        "--sleep-max-call",
+        action="store",
+        type=parse_duration,
+        default=None,
+        dest="sleep_max_call",
+        help="Allow calls of time.sleep not longer than this duration, e.g. 50ms.",
+    )
+    group.addoption(
+        "--sleep-budget-per-test",
+        action="store",
+        type=parse_duration,
+        default=None,
+        dest="sleep_budget_per_test",
+        help="Fail test once it really slept longer than this duration, e.g. 1s.",
+    )
+    group.addoption(
+        "--sleep-budget-session",
+        action="store",
+        type=parse_duration,
+        default=None,
+        dest="sleep_budget_session",
+        help="Stop session once all tests really slept longer than this duration, e.g. 5m.",
+    )
+    group.addoption(
+        "--sleep-scale",
+        action="store",
+        type=float,
+        default=None,
+        dest="sleep_scale",
+        help="Really sleep only this part of requested time in allowed calls "
+        "of time.sleep and asyncio.sleep, e.g. 0.05.",
+    )
+    group.addoption(
+        "--sleep-scale-floor",
+        action="store",
+        type=parse_duration,
+        default=0.001,
+        dest="sleep_scale_floor",
+        help="Scaled sleeping isn't shorter than this duration, default 1ms.",
+    )
+    group.addoption(
+        "--whitelist-stack",
+        action="store_true",
+        dest="whitelist_stack",
+        help="Allow time.sleep if any frame of the call stack belongs to whitelisted modules, "
+        "not only the caller.",
+    )
+    group.addoption(
+        "--sleep-thread-policy",
+        action="store",
+        choices=THREAD_POLICIES,
+        default=THREAD_POLICY_MAIN,
+        dest="sleep_thread_policy",
+        help="Policy of threads started by tests: "
+        "main - follow the main thread (default), "
+        "inherit - copy the policy of the context which started the thread (Python 3.7+), "
+        "allow - always allow time.sleep, "
+        "default - use only --disable-sleep.",
+    )
+    group.addoption(
+        "--sleep-subprocess",
+        action="store_true",
+        dest="sleep_subprocess",
+        help="Apply the sleep policy of the test to Python processes which it starts "
+        "by subprocess or multiprocessing and add their sleeping to the test.",
+    )
+    group.addoption(
+        "--sleep-target",
+        action="append",
+        default=[],
+        dest="sleep_target",
+        help="Check calls with timeout of this blocking callable the same way as time.sleep, "
+        'e.g. "threading.Event.wait", "queue.Queue.get" or "select.select".',
+    )
+    group.addoption(
+        "--sleep-import-hook",
+        action="store_true",
+        dest="sleep_import_hook",
+        help="Patch only newly imported modules instead of checking all sys.modules "
+        "on every call of `disable_time_sleep` (Python 3 only).",
+    )
+    group.addoption(
+        "--fast-forward-sleep",
+        action="store_true",
+        dest="fast_forward_sleep",
+        help="Disable time.sleep by default, but instead of raising an error "
+        "advance virtual time of time.time, time.monotonic, time.perf_counter "
+        "and datetime.now.",
+    )
+    group.addoption(
+        "--fast-forward-grace",
+        action="store",
+        type=parse_duration,
+        default=DEFAULT_GRACE,
+        dest="fast_forward_grace",
+        help="In --fast-forward-sleep mode wake the nearest sleeping thread "
+        "if other threads which slept before are busy longer than this real duration, "
+        "default 50ms.",
+    )
+    group.addoption(
+        "--sleep-report-top",
+        action="store",
+        type=int,
+        default=0,
+        dest="sleep_report_top",
+        help="Show N tests which spent the most time in time.sleep.",
+    )
+    group.addoption(
+        "--sleep-report-json",
+        action="store",
+        default=None,
+        dest="sleep_report_json",
+        help="Save time spent in time.sleep per test to JSON file.",
+    )
+    group.addoption(
+        "--sleep-audit",
+        action="store_true",
+        dest="sleep_audit",
+        help="Disable time.sleep by default, but instead of raising an error "
+        "collect all call sites and show them at the end of session.",
+    )
+
+
+def is_sleep_disabled_by_default(config):
+    """
+    Parameters
+    ----------
+    config: _pytest.config.Config
+
+    Returns
+    -------
+    bool
+    """
+    return bool(
+        config.getoption("--disable-sleep")
+        or config.getoption("--fast-forward-sleep")
+        or config.getoption("--sleep-audit")
     )
 
 
@@ -83,6 +385,18 @@ def enable_time_sleep():
         yield
 
 
+@pytest.fixture
+def virtual_time_loop():
+    """
+    This fixture provides asyncio event loop with virtual clock,
+    so `asyncio.sleep`, timeouts and `loop.call_later` complete instantly
+    """
+    if using_virtual_time_loop is None:
+        pytest.skip("asyncio is not available")
+    with using_virtual_time_loop() as loop:
+        yield loop
+
+
 @pytest.fixture(autouse=True)
 def never_sleep(request):
     """
@@ -92,61 +406,561 @@ def never_sleep(request):
     """
     if get_marker(request, MARK_ALLOW_TIME_SLEEP):
         request.getfixturevalue("enable_time_sleep")
-    elif request.config.getoption("--disable-sleep"):
+    elif is_sleep_disabled_by_default(request.config):
         request.getfixturevalue("disable_time_sleep")
     elif get_marker(request, MARK_NOT_ALLOW_TIME_SLEEP):
         request.getfixturevalue("disable_time_sleep")
 
 
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_protocol(item):
+    """
+    Attaches real sleeping time to the running test, checks sleep budgets
+    and measures idle time of the test
+    """
+    _fake_time_sleep.stats.start(item.nodeid)
+    _fake_time_sleep.item = item
+    _fake_time_sleep.test_budget = get_test_budget(item)
+    _fake_time_sleep.scale = get_test_scale(item)
+    _fake_time_sleep.scheduler.reset()
+    if _fake_time_sleep.idle is not None:
+        _fake_time_sleep.idle.start(_true_time_perf_counter())
+    try:
+        yield
+    finally:
+        if _fake_time_sleep.idle is not None:
+            _fake_time_sleep.idle.stop(
+                item.nodeid,
+                _true_time_perf_counter(),
+                _fake_time_sleep.stats.get_seconds(item.nodeid),
+            )
+        _fake_time_sleep.stats.stop()
+        _fake_time_sleep.item = None
+        _fake_time_sleep.test_budget = None
+        _fake_time_sleep.scale = None
+    session_budget = item.config.getoption("--sleep-budget-session")
+    if (
+        session_budget is not None
+        and _fake_time_sleep.stats.total_seconds > session_budget
+    ):
+        item.session.shouldfail = (
+            "never sleep: session slept {:.3f}s of {:.3f}s budget".format(
+                _fake_time_sleep.stats.total_seconds, session_budget
+            )
+        )
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    """
+    Child processes started by the test follow its policy,
+    their not allowed calls fail the test
+    """
+    propagation = _fake_time_sleep.subprocess
+    if propagation is None:
+        yield
+        return
+    propagation.set_test(item.nodeid)
+    outcome = yield
+    propagation.set_test(None)
+    violations = propagation.collect(item.nodeid)
+    if violations and outcome.excinfo is None:
+        error = TimeSleepUsageError(
+            "{} not allowed calls of {} in child processes {}".format(
+                sum(violations.values()),
+                TARGET_NAME,
+                ", ".join(str(pid) for pid in sorted(violations)),
+            )
+        )
+        force_exception = getattr(outcome, "force_exception", None)
+        if force_exception is None:  # pluggy<1.1 passes errors of hookwrappers through
+            raise error
+        force_exception(error)
+
+
+def get_test_budget(item):
+    """
+    Parameters
+    ----------
+    item: _pytest.nodes.Item
+
+    Returns
+    -------
+    Optional[float]
+        seconds from `sleep_budget` marker or `--sleep-budget-per-test`
+    """
+    marker = get_node_marker(item, MARK_SLEEP_BUDGET)
+    if marker is not None and marker.args:
+        return parse_duration(marker.args[0])
+    return item.config.getoption("--sleep-budget-per-test")
+
+
+def get_test_scale(item):
+    """
+    Parameters
+    ----------
+    item: _pytest.nodes.Item
+
+    Returns
+    -------
+    Optional[float]
+        factor from `sleep_scale` marker or `--sleep-scale`
+    """
+    marker = get_node_marker(item, MARK_SLEEP_SCALE)
+    if marker is not None and marker.args:
+        return float(marker.args[0])
+    return item.config.getoption("--sleep-scale")
+
+
 def pytest_sessionstart(session):
     """
     Disabled `time.sleep` on whole pytest session only in case when `--disable-sleep` was passed
     """
-    whitelist = []
-    other = session.config.hook.pytest_never_sleep_whitelist()
-    if other:
-        whitelist.extend(other)
-    whitelist.extend(session.config.option.whitelist)
+    workerinput = getattr(session.config, "workerinput", None) or {}
+    if XDIST_WHITELIST_KEY in workerinput:
+        # pytest-xdist worker reuses whitelist which was computed by controller
+        whitelist = workerinput[XDIST_WHITELIST_KEY]
+    else:
+        whitelist = []
+        other = session.config.hook.pytest_never_sleep_whitelist()
+        if other:
+            whitelist.extend(other)
+        whitelist.extend(session.config.getini("never_sleep_whitelist"))
+        whitelist.extend(session.config.option.whitelist)
+        root_dir = str(session.config.rootdir)
+        whitelist = [resolve_pattern(pattern, root_dir) for pattern in whitelist]
 
     # configuration for FakeSleep
     _fake_time_sleep.pytest_config = session.config
-    _fake_time_sleep.is_allow_time_sleep_by_default = not bool(
-        session.config.getoption("--disable-sleep")
+    _fake_time_sleep.is_allow_time_sleep_by_default = not is_sleep_disabled_by_default(
+        session.config
     )
     _fake_time_sleep.whitelist = tuple(whitelist)
+    _fake_time_sleep.is_whitelist_stack = session.config.getoption("--whitelist-stack")
+    _fake_time_sleep.thread_policy = session.config.getoption("--sleep-thread-policy")
+    _fake_time_sleep.max_call_seconds = session.config.getoption("--sleep-max-call")
+    _fake_time_sleep.scale_floor = session.config.getoption("--sleep-scale-floor")
+    _fake_time_sleep.scheduler.grace = session.config.getoption("--fast-forward-grace")
+    _fake_time_sleep.set_targets(get_targets(session.config))
     _fake_time_sleep.get_message = session.config.hook.pytest_never_sleep_message_format
+    _fake_time_sleep.stats = SleepStats()
+    _fake_time_sleep.audit = None
+    _fake_time_sleep.idle = None
+    _fake_time_sleep.scan = None
+    _fake_time_sleep.regressions = None
+    if session.config.getoption("--sleep-audit"):
+        _fake_time_sleep.audit = SleepAudit()
+    idle_ratio = session.config.getoption("--sleep-idle-ratio")
+    if idle_ratio is not None:
+        _fake_time_sleep.idle = IdleDetector(
+            idle_ratio, session.config.getoption("--sleep-idle-min")
+        )
+    if session.config.getoption("--sleep-import-hook") and sys.version_info[0] < 3:
+        raise pytest.UsageError("--sleep-import-hook requires Python 3")
+    scale = session.config.getoption("--sleep-scale")
+    if scale is not None and not 0 <= scale <= 1:
+        raise pytest.UsageError("--sleep-scale has to be between 0 and 1")
+    if _fake_time_sleep.thread_policy == THREAD_POLICY_INHERIT and contextvars is None:
+        raise pytest.UsageError("--sleep-thread-policy=inherit requires Python 3.7")
+    update_call_hook(session.config)
+    if is_patch_required(session.config):
+        activate_never_sleep(session.config)
+    if session.config.getoption("--sleep-subprocess"):
+        _fake_time_sleep.subprocess = child.ChildPropagation(_fake_time_sleep)
+        _fake_time_sleep.subprocess.start()
+
+
+def is_patch_required(config):
+    """
+    Without these options `time.sleep` is denied only by the marker or fixture,
+    so patching is deferred until collection finds them
+
+    Parameters
+    ----------
+    config: _pytest.config.Config
+
+    Returns
+    -------
+    bool
+    """
+    return bool(
+        is_sleep_disabled_by_default(config)
+        or config.getoption("--sleep-report-top") > 0
+        or config.getoption("--sleep-report-json")
+        or config.getoption("--sleep-regressions")
+        or config.getoption("--sleep-schedule")
+        or config.getoption("--sleep-budget-per-test") is not None
+        or config.getoption("--sleep-budget-session") is not None
+        or config.getoption("--sleep-scale") is not None
+        or config.getoption("--sleep-subprocess")
+        or config.getoption("--sleep-idle-ratio") is not None
+        or _fake_time_sleep.listeners
+    )
+
+
+def is_patch_required_for_item(item):
+    """
+    Parameters
+    ----------
+    item: _pytest.nodes.Item
+
+    Returns
+    -------
+    bool
+        True if test disables `time.sleep`, scales it or limits its time
+    """
+    return bool(
+        is_sleep_disabled_for_item(item)
+        or get_node_marker(item, MARK_SLEEP_SCALE)
+        or get_node_marker(item, MARK_SLEEP_BUDGET)
+    )
+
+
+def is_sleep_disabled_for_item(item):
+    """
+    Parameters
+    ----------
+    item: _pytest.nodes.Item
+
+    Returns
+    -------
+    bool
+        True if test uses `disable_time_sleep` marker or fixture
+    """
+    return bool(
+        MARK_NOT_ALLOW_TIME_SLEEP in getattr(item, "fixturenames", ())
+        or get_node_marker(item, MARK_NOT_ALLOW_TIME_SLEEP)
+    )
+
+
+def activate_never_sleep(config):
+    """
+    Patches `time.sleep` and other targets
+
+    Parameters
+    ----------
+    config: _pytest.config.Config
+    """
+    if config.getoption("--sleep-import-hook"):
+        _fake_time_sleep.install_import_hook()
+    if config.getoption("--fast-forward-sleep"):
+        _fake_time_sleep.enable_fast_forward()
     _fake_time_sleep.patch_time_sleep()
+    # `is_patched` is already dropped when the profile is updated
+    _fake_time_sleep.stats.is_recording = True
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_collection_modifyitems(config, items):
+    """
+    Scans tests for `time.sleep` calls, starts the longest sleepers first and
+    patches `time.sleep` before the first test if any test can disable it
+
+    It goes before pytest-xdist, which reads `xdist_group` marks
+    """
+    if config.getoption("--sleep-scan") or config.getoption("--deselect-sleepers"):
+        scan_sleepers(config, items)
+    if config.getoption("--sleep-schedule"):
+        schedule_sleepers(config, items)
+    # conftest files of subdirectories are loaded during collection
+    update_call_hook(config)
+    if _fake_time_sleep.is_patched:
+        return
+    if _fake_time_sleep.listeners or any(
+        is_patch_required_for_item(item) for item in items
+    ):
+        activate_never_sleep(config)
+
+
+def get_sleep_profile(config):
+    """
+    Parameters
+    ----------
+    config: _pytest.config.Config
+
+    Returns
+    -------
+    Dict[str, List[float, int]]
+        stored sleeping time and calls per test,
+        nodeids don't have group suffix which is added by pytest-xdist
+    """
+    cache = getattr(config, "cache", None)
+    if cache is None:
+        return {}
+    profile = {}
+    for nodeid, record in cache.get(PROFILE_CACHE_KEY, {}).items():
+        name, separator, group = nodeid.rpartition("@")
+        if separator and not any(char in group for char in "]/:"):
+            nodeid = name
+        profile[nodeid] = record
+    return profile
+
+
+def get_xdist_workers_count(config):
+    """
+    Parameters
+    ----------
+    config: _pytest.config.Config
+
+    Returns
+    -------
+    int
+        0 without pytest-xdist
+    """
+    workerinput = getattr(config, "workerinput", None)
+    if workerinput is not None:
+        return workerinput.get("workercount", 0)
+    count = getattr(config.option, "numprocesses", None)
+    return count if isinstance(count, int) else 0
+
+
+def schedule_sleepers(config, items):
+    """
+    Longest processing time first: tests which slept the most in previous runs start first.
+    With `pytest-xdist --dist loadgroup` sleepers are spread between
+    `xdist_group` groups per worker, so they don't pile onto one worker
+
+    Parameters
+    ----------
+    config: _pytest.config.Config
+    items: List[_pytest.nodes.Item]
+    """
+    profile = get_sleep_profile(config)
+    if not profile:
+        return
+
+    def get_seconds(item):
+        return profile.get(item.nodeid, (0.0, 0))[0]
+
+    # sorting is stable, so other tests keep their order
+    items.sort(key=get_seconds, reverse=True)
+
+    workers = get_xdist_workers_count(config)
+    if workers < 2 or getattr(config.option, "dist", None) != "loadgroup":
+        return
+    loads = [0.0] * workers
+    for item in items:
+        seconds = get_seconds(item)
+        if seconds <= 0:
+            break
+        if get_node_marker(item, "xdist_group"):
+            continue
+        worker = loads.index(min(loads))
+        loads[worker] += seconds
+        item.add_marker(pytest.mark.xdist_group(name="never_sleep_{}".format(worker)))
+
+
+def get_item_functions(item):
+    """
+    Parameters
+    ----------
+    item: _pytest.nodes.Item
+
+    Returns
+    -------
+    List[Callable]
+        test function and its fixtures
+    """
+    functions = []
+    test_function = getattr(item, "obj", None)
+    if test_function is not None:
+        functions.append(test_function)
+    fixture_info = getattr(item, "_fixtureinfo", None)
+    for fixture_defs in getattr(fixture_info, "name2fixturedefs", {}).values():
+        if fixture_defs:
+            functions.append(fixture_defs[-1].func)
+    return functions
+
+
+def scan_sleepers(config, items):
+    """
+    Finds `time.sleep` calls which tests can reach, deselects these tests
+    if `--deselect-sleepers` was passed
+
+    Parameters
+    ----------
+    config: _pytest.config.Config
+    items: List[_pytest.nodes.Item]
+    """
+    cache = getattr(config, "cache", None)
+    scanner = SleepScanner(
+        # clock of fast forward mode is replaced too, but it isn't sleeping
+        targets=[
+            target.path
+            for target in _fake_time_sleep.targets
+            if target.is_function and target.path not in CLOCK_TARGETS
+        ],
+        root_dir=str(config.rootdir),
+        cache=cache.get(CACHE_KEY, {}) if cache is not None else None,
+    )
+    site_tests = {}
+    sleepers = []
+    for item in items:
+        sites = set()
+        for function in get_item_functions(item):
+            sites.update(scanner.get_function_sites(function))
+        for site in sites:
+            site_tests.setdefault(site, []).append(item.nodeid)
+        if sites:
+            sleepers.append(item)
+    if cache is not None and scanner.is_cache_changed:
+        cache.set(CACHE_KEY, scanner.cache)
+
+    _fake_time_sleep.scan = [
+        {
+            "path": path,
+            "lineno": lineno,
+            "name": name,
+            "target": target,
+            "tests": sorted(site_tests.get((path, lineno, name, target), [])),
+        }
+        for path, lineno, name, target in scanner.get_all_sites()
+    ]
+    if config.getoption("--deselect-sleepers") and sleepers:
+        deselected = set(sleepers)
+        config.hook.pytest_deselected(items=sleepers)
+        items[:] = [item for item in items if item not in deselected]
+
+
+def get_targets(config):
+    """
+    Parameters
+    ----------
+    config: _pytest.config.Config
+
+    Returns
+    -------
+    List[str | pytest_never_sleep.targets.Target]
+        `time.sleep`, `asyncio.sleep` and targets from hooks and command line
+    """
+    targets = list(DEFAULT_TARGETS)
+    for other in config.hook.pytest_never_sleep_targets():
+        targets.extend(other)
+    targets.extend(config.getoption("--sleep-target"))
+    return targets
 
 
-def pytest_sessionfinish():
+def pytest_sessionfinish(session):
     """
     After all tests return back `time.sleep`
     """
+    if _fake_time_sleep.subprocess is not None:
+        _fake_time_sleep.subprocess.stop()
+        _fake_time_sleep.subprocess = None
     _fake_time_sleep.unpatch_time_sleep()
+    report = get_sleep_report(_fake_time_sleep)
+    workeroutput = getattr(session.config, "workeroutput", None)
+    if workeroutput is not None:
+        workeroutput[XDIST_REPORT_KEY] = report
+    else:
+        update_sleep_profile(session)
+
+    report_path = session.config.getoption("--sleep-report-json")
+    if report_path:
+        write_sleep_report_json(report_path, report)
+
+
+def update_sleep_profile(session):
+    """
+    Stores sleeping time per test in .pytest_cache and compares it with previous runs
+    if `--sleep-regressions` was passed, regressed tests keep their previous time,
+    so they are reported until fixed. Tests which ran without sleeping are stored
+    with zero time, so their old time doesn't hide new sleeping.
+    Sessions which didn't patch `time.sleep` keep the profile as is
+
+    Parameters
+    ----------
+    session: _pytest.main.Session
+    """
+    cache = getattr(session.config, "cache", None)
+    if cache is None or not _fake_time_sleep.stats.is_recording:
+        return
+    profile = dict((nodeid, [0.0, 0]) for nodeid in _fake_time_sleep.stats.executed)
+    profile.update(_fake_time_sleep.stats.tests)
+    if not profile:
+        return
+    baseline = cache.get(PROFILE_CACHE_KEY, {})
+    regressed = set()
+    if session.config.getoption("--sleep-regressions") and baseline:
+        _fake_time_sleep.regressions = find_regressions(
+            profile,
+            baseline,
+            session.config.getoption("--sleep-regressions-tolerance"),
+        )
+        regressed = set(nodeid for nodeid, _, _ in _fake_time_sleep.regressions)
+        if regressed and session.exitstatus == 0:
+            session.exitstatus = 1
+    for nodeid, record in profile.items():
+        if nodeid not in regressed:
+            baseline[nodeid] = record
+    cache.set(PROFILE_CACHE_KEY, baseline)
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_configure_node(node):
+    """
+    pytest-xdist hook, passes whitelist to the worker
+
+    Parameters
+    ----------
+    node: xdist.workermanage.WorkerController
+    """
+    node.workerinput[XDIST_WHITELIST_KEY] = list(_fake_time_sleep.whitelist or ())
+
+
+def pytest_runtest_logreport(report):
+    """
+    Remembers tests which ran, reports of pytest-xdist workers come here too
+
+    Parameters
+    ----------
+    report: _pytest.reports.TestReport
+    """
+    if report.when == "call":
+        _fake_time_sleep.stats.record_executed(report.nodeid)
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node):
+    """
+    pytest-xdist hook, merges information which was collected by the worker
+
+    Parameters
+    ----------
+    node: xdist.workermanage.WorkerController
+    """
+    report = getattr(node, "workeroutput", {}).get(XDIST_REPORT_KEY)
+    if report:
+        merge_sleep_report(_fake_time_sleep, report)
+
+
+def pytest_terminal_summary(terminalreporter):
+    """
+    Shows collected information about `time.sleep` usage
+    """
+    write_sleep_summary(terminalreporter, _fake_time_sleep)
 
 
 @pytest.hookimpl(trylast=True)
-def pytest_never_sleep_message_format(config, frame):
+def pytest_never_sleep_message_format(config, frame, target):
     """
     Parameters
     ----------
     config: _pytest.config.Config
     frame: frame
+    target: str
 
     Returns
     -------
     str
     """
-    root_dir = str(config.rootdir)
-    path = frame.f_code.co_filename
-    if root_dir in path:
-        path = path.replace(root_dir, "").strip("/")
+    path = get_relative_path(config, frame.f_code.co_filename)
     msg = (
         "Method `{method}` uses `{target}`.\nIt can lead to degradation of test runtime, "
         "please check '{path}' line {number} "
         "and use `mock` for that peace of code."
     ).format(
-        target=TARGET_NAME,
+        target=target,
         method=frame.f_code.co_name,
         path=path,
         number=frame.f_code.co_firstlineno,
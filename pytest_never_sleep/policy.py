@@ -0,0 +1,110 @@
+import threading
+
+try:
+    import contextvars
+except ImportError:  # Python < 3.7 doesn't have contextvars
+    contextvars = None
+
+THREAD_POLICY_MAIN = "main"
+THREAD_POLICY_INHERIT = "inherit"
+THREAD_POLICY_ALLOW = "allow"
+THREAD_POLICY_DEFAULT = "default"
+THREAD_POLICIES = (
+    THREAD_POLICY_MAIN,
+    THREAD_POLICY_INHERIT,
+    THREAD_POLICY_ALLOW,
+    THREAD_POLICY_DEFAULT,
+)
+
+# decisions about calls which are passed to listeners
+DECISION_ALLOWED = "allowed"
+DECISION_DENIED = "denied"
+DECISION_FAST_FORWARD = "fast_forward"
+DECISION_AUDIT = "audit"
+
+_true_thread_start = threading.Thread.start
+
+
+def is_main_thread():
+    """
+    Returns
+    -------
+    bool
+    """
+    main_thread = getattr(threading, "main_thread", None)
+    if main_thread is None:  # Python 2
+        return isinstance(
+            threading.current_thread(),
+            threading._MainThread,  # pylint: disable=protected-access
+        )
+    return threading.current_thread() is main_thread()
+
+
+class ContextPolicy(object):
+    """
+    Value which is local for context: thread or asyncio task,
+    on Python without contextvars it's local only for thread
+    """
+
+    def __init__(self, name):
+        """
+        Parameters
+        ----------
+        name: str
+        """
+        self._var = None
+        self._local = None
+        if contextvars is not None:
+            self._var = contextvars.ContextVar(name, default=None)
+        else:
+            self._local = threading.local()
+
+    def get(self):
+        """
+        Returns
+        -------
+        Optional[bool]
+            None if policy isn't set in this context
+        """
+        if self._var is not None:
+            return self._var.get()
+        return getattr(self._local, "value", None)
+
+    def set(self, value):
+        """
+        Parameters
+        ----------
+        value: Optional[bool]
+
+        Returns
+        -------
+        token which returns back the previous value
+        """
+        if self._var is not None:
+            return self._var.set(value)
+        token = self.get()
+        self._local.value = value
+        return token
+
+    def reset(self, token):
+        """
+        Parameters
+        ----------
+        token:
+            result of `set`
+        """
+        if self._var is not None:
+            self._var.reset(token)
+        else:
+            self._local.value = token
+
+
+def inheriting_thread_start(thread):
+    """
+    Fake implementation of `threading.Thread.start` which runs the thread
+    in a copy of the context where it was started, so the thread inherits the policy
+    """
+    context = contextvars.copy_context()
+    run = thread.run
+    thread.run = lambda: context.run(run)
+    return _true_thread_start(thread)
@@ -0,0 +1,251 @@
+import json
+
+from pytest_never_sleep.never_sleep import TARGET_NAME
+from pytest_never_sleep.stats import IdleDetector, SleepAudit
+
+
+def get_relative_path(config, path):
+    """
+    Parameters
+    ----------
+    config: _pytest.config.Config
+    path: str
+
+    Returns
+    -------
+    str
+        path relative to rootdir if it's inside
+    """
+    root_dir = str(config.rootdir)
+    if root_dir in path:
+        path = path.replace(root_dir, "").strip("/")
+    return path
+
+
+def get_sleep_report(fake_sleep):
+    """
+    Parameters
+    ----------
+    fake_sleep: pytest_never_sleep.never_sleep.FakeSleep
+
+    Returns
+    -------
+    dict
+        JSON serializable information about `time.sleep` usage
+    """
+    report = fake_sleep.stats.to_dict()
+    if fake_sleep.audit is not None:
+        report["audit"] = fake_sleep.audit.report()
+    if fake_sleep.idle is not None:
+        report["idle"] = fake_sleep.idle.report()
+    if fake_sleep.scan is not None:
+        report["scan"] = fake_sleep.scan
+    return report
+
+
+def merge_sleep_report(fake_sleep, report):
+    """
+    Adds information which was collected by other process, e.g. pytest-xdist worker
+
+    Parameters
+    ----------
+    fake_sleep: pytest_never_sleep.never_sleep.FakeSleep
+    report: dict
+        result of `get_sleep_report`
+    """
+    fake_sleep.stats.merge(report)
+    if "audit" in report:
+        if fake_sleep.audit is None:
+            fake_sleep.audit = SleepAudit()
+        fake_sleep.audit.merge(report["audit"])
+    if "idle" in report:
+        if fake_sleep.idle is None:
+            fake_sleep.idle = IdleDetector(0.0)
+        fake_sleep.idle.merge(report["idle"])
+
+
+def write_sleep_report_json(path, report):
+    """
+    Parameters
+    ----------
+    path: str
+    report: dict
+        result of `get_sleep_report`
+    """
+    with open(path, "w") as report_file:
+        json.dump(report, report_file, indent=2)
+
+
+def write_sleep_stats(terminalreporter, fake_sleep):
+    """
+    Shows tests which spent the most time in `time.sleep`
+
+    Parameters
+    ----------
+    terminalreporter: _pytest.terminal.TerminalReporter
+    fake_sleep: pytest_never_sleep.never_sleep.FakeSleep
+    """
+    limit = terminalreporter.config.getoption("--sleep-report-top")
+    if limit <= 0:
+        return
+    records = fake_sleep.stats.top(limit)
+    violations = fake_sleep.stats.violations
+    if not records and not violations:
+        return
+    terminalreporter.write_sep("=", "never sleep: top {} sleepiest tests".format(limit))
+    for nodeid, seconds, calls in records:
+        terminalreporter.write_line(
+            "{:10.2f}s {:6} calls  {}".format(seconds, calls, nodeid)
+        )
+    if violations:
+        terminalreporter.write_line(
+            "{} not allowed calls of {} in {} tests".format(
+                sum(violations.values()), TARGET_NAME, len(violations)
+            )
+        )
+
+
+def write_sleep_scale(terminalreporter, fake_sleep):
+    """
+    Shows time which was scaled away by `--sleep-scale` or `sleep_scale` marker
+
+    Parameters
+    ----------
+    terminalreporter: _pytest.terminal.TerminalReporter
+    fake_sleep: pytest_never_sleep.never_sleep.FakeSleep
+    """
+    scaled = fake_sleep.stats.scaled
+    if not scaled:
+        return
+    terminalreporter.write_sep(
+        "=",
+        "never sleep: scaled away {:.2f}s of {} in {} tests".format(
+            sum(scaled.values()), TARGET_NAME, len(scaled)
+        ),
+    )
+
+
+def write_sleep_idle(terminalreporter, fake_sleep):
+    """
+    Shows tests which waited outside of `time.sleep`
+
+    Parameters
+    ----------
+    terminalreporter: _pytest.terminal.TerminalReporter
+    fake_sleep: pytest_never_sleep.never_sleep.FakeSleep
+    """
+    if fake_sleep.idle is None or not fake_sleep.idle.tests:
+        return
+    records = fake_sleep.idle.top()
+    terminalreporter.write_sep(
+        "=",
+        "never sleep: {} idle tests, waits which can't be patched".format(len(records)),
+    )
+    for nodeid, wall, cpu, slept in records:
+        terminalreporter.write_line(
+            "{:10.2f}s idle {:8.2f}s wall {:8.2f}s cpu {:8.2f}s sleep  {}".format(
+                wall - cpu - slept, wall, cpu, slept, nodeid
+            )
+        )
+
+
+def write_sleep_audit(terminalreporter, fake_sleep):
+    """
+    Shows all call sites of not allowed `time.sleep` ranked by requested time
+
+    Parameters
+    ----------
+    terminalreporter: _pytest.terminal.TerminalReporter
+    fake_sleep: pytest_never_sleep.never_sleep.FakeSleep
+    """
+    if fake_sleep.audit is None:
+        return
+    sites = fake_sleep.audit.report()
+    terminalreporter.write_sep(
+        "=", "never sleep audit: {} call sites of {}".format(len(sites), TARGET_NAME)
+    )
+    for site in sites:
+        terminalreporter.write_line(
+            "{:10.2f}s {:6} calls {:4} tests  {}:{} ({})".format(
+                site["seconds"],
+                site["calls"],
+                len(site["tests"]),
+                get_relative_path(terminalreporter.config, site["path"]),
+                site["lineno"],
+                site["name"],
+            )
+        )
+
+
+def write_sleep_scan(terminalreporter, fake_sleep):
+    """
+    Shows call sites of `time.sleep` which were found by static scan
+
+    Parameters
+    ----------
+    terminalreporter: _pytest.terminal.TerminalReporter
+    fake_sleep: pytest_never_sleep.never_sleep.FakeSleep
+    """
+    if fake_sleep.scan is None:
+        return
+    sites = fake_sleep.scan
+    tests = set()
+    for site in sites:
+        tests.update(site["tests"])
+    terminalreporter.write_sep(
+        "=",
+        "never sleep scan: {} call sites reached by {} tests".format(
+            len(sites), len(tests)
+        ),
+    )
+    for site in sites:
+        terminalreporter.write_line(
+            "{:6} tests  {}:{} ({}) {}".format(
+                len(site["tests"]),
+                get_relative_path(terminalreporter.config, site["path"]),
+                site["lineno"],
+                site["name"],
+                site["target"],
+            )
+        )
+
+
+def write_sleep_regressions(terminalreporter, fake_sleep):
+    """
+    Shows tests which sleep longer than in previous runs
+
+    Parameters
+    ----------
+    terminalreporter: _pytest.terminal.TerminalReporter
+    fake_sleep: pytest_never_sleep.never_sleep.FakeSleep
+    """
+    if not fake_sleep.regressions:
+        return
+    terminalreporter.write_sep(
+        "=",
+        "never sleep regressions: {} tests sleep longer than before".format(
+            len(fake_sleep.regressions)
+        ),
+        red=True,
+    )
+    for nodeid, before, now in fake_sleep.regressions:
+        terminalreporter.write_line(
+            "{:10.2f}s -> {:.2f}s  {}".format(before, now, nodeid)
+        )
+
+
+def write_sleep_summary(terminalreporter, fake_sleep):
+    """
+    Shows collected information about `time.sleep` usage
+
+    Parameters
+    ----------
+    terminalreporter: _pytest.terminal.TerminalReporter
+    fake_sleep: pytest_never_sleep.never_sleep.FakeSleep
+    """
+    write_sleep_stats(terminalreporter, fake_sleep)
+    write_sleep_scale(terminalreporter, fake_sleep)
+    write_sleep_audit(terminalreporter, fake_sleep)
+    write_sleep_idle(terminalreporter, fake_sleep)
+    write_sleep_scan(terminalreporter, fake_sleep)
+    write_sleep_regressions(terminalreporter, fake_sleep)
@@ -0,0 +1,476 @@
+import ast
+import os
+import sys
+
+CACHE_KEY = "never_sleep/scan"
+MODULE_SCOPE = "<module>"
+
+
+def get_dotted_name(node):
+    """
+    Parameters
+    ----------
+    node: ast.expr
+
+    Returns
+    -------
+    Optional[str]
+        "time.sleep" for `time.sleep`, None for calls of other expressions
+    """
+    parts = []
+    while isinstance(node, ast.Attribute):
+        parts.append(node.attr)
+        node = node.value
+    if not isinstance(node, ast.Name):
+        return None
+    parts.append(node.id)
+    return ".".join(reversed(parts))
+
+
+class _ModuleVisitor(ast.NodeVisitor):
+    """
+    Collects imports and calls of module grouped by top level functions and methods,
+    calls in nested functions belong to the outer one
+    """
+
+    def __init__(self):
+        self.scope = MODULE_SCOPE
+        self.class_name = None
+        self.imports = {}  # {scope: {alias: [module, name]}}
+        self.calls = []  # [(scope, dotted name, lineno)]
+
+    def _add_import(self, alias, module, name):
+        self.imports.setdefault(self.scope, {})[alias] = [module, name]
+
+    def visit_Import(self, node):  # pylint: disable=invalid-name
+        """
+        `import time` binds the top level package, `import time as t` binds the module
+
+        Parameters
+        ----------
+        node: ast.Import
+        """
+        for alias in node.names:
+            if alias.asname:
+                self._add_import(alias.asname, alias.name, None)
+            else:
+                head = alias.name.partition(".")[0]
+                self._add_import(head, head, None)
+
+    def visit_ImportFrom(self, node):  # pylint: disable=invalid-name
+        """
+        Relative imports keep leading dots, star imports are skipped
+
+        Parameters
+        ----------
+        node: ast.ImportFrom
+        """
+        module = "." * (node.level or 0) + (node.module or "")
+        for alias in node.names:
+            if alias.name != "*":
+                self._add_import(alias.asname or alias.name, module, alias.name)
+
+    def visit_ClassDef(self, node):  # pylint: disable=invalid-name
+        """
+        Only top level classes name scopes of their methods
+
+        Parameters
+        ----------
+        node: ast.ClassDef
+        """
+        if self.scope != MODULE_SCOPE or self.class_name is not None:
+            self.generic_visit(node)
+            return
+        self.class_name = node.name
+        self.generic_visit(node)
+        self.class_name = None
+
+    def visit_FunctionDef(self, node):  # pylint: disable=invalid-name
+        """
+        Top level functions and methods open own scope, nested ones belong to it
+
+        Parameters
+        ----------
+        node: ast.FunctionDef | ast.AsyncFunctionDef
+        """
+        if self.scope != MODULE_SCOPE:
+            self.generic_visit(node)
+            return
+        self.scope = node.name
+        if self.class_name is not None:
+            self.scope = "{}.{}".format(self.class_name, node.name)
+        self.generic_visit(node)
+        self.scope = MODULE_SCOPE
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_Call(self, node):  # pylint: disable=invalid-name
+        """
+        Records calls of names and attributes, e.g. `sleep(1)` or `time.sleep(1)`
+
+        Parameters
+        ----------
+        node: ast.Call
+        """
+        name = get_dotted_name(node.func)
+        if name is not None:
+            self.calls.append((self.scope, name, node.lineno))
+        self.generic_visit(node)
+
+
+def get_binding(imports, scope, dotted_name):
+    """
+    Parameters
+    ----------
+    imports: dict
+        {scope: {alias: [module, name]}}
+    scope: str
+    dotted_name: str
+        "time.sleep"
+
+    Returns
+    -------
+    Optional[str]
+        absolute name of called object if its head is imported,
+        relative imports keep leading dots: "..helpers.wait"
+    """
+    head, _, rest = dotted_name.partition(".")
+    binding = imports.get(scope, {}).get(head) or imports.get(MODULE_SCOPE, {}).get(
+        head
+    )
+    if binding is None:
+        return None
+    module, name = binding
+    absolute = module
+    if name is not None:
+        absolute = (
+            module + name if module.endswith(".") else "{}.{}".format(module, name)
+        )
+    return "{}.{}".format(absolute, rest) if rest else absolute
+
+
+def scan_source(source, filename, targets):
+    """
+    Parameters
+    ----------
+    source: bytes | str
+    filename: str
+    targets: frozenset[str]
+        {"time.sleep", "asyncio.sleep"}
+
+    Returns
+    -------
+    dict
+        JSON serializable result:
+        {
+            "sites": [[12, "wait", "time.sleep"]],
+            "calls": {"test_a": ["wait"]},
+            "imports": {"<module>": {"wait": ["helpers", "wait"]}},
+        }
+
+    Raises
+    ------
+    SyntaxError
+    ValueError
+    """
+    visitor = _ModuleVisitor()
+    visitor.visit(ast.parse(source, filename))
+    sites = []
+    calls = {}
+    for scope, name, lineno in visitor.calls:
+        absolute = get_binding(visitor.imports, scope, name)
+        if absolute in targets:
+            sites.append([lineno, scope, absolute])
+        else:
+            calls.setdefault(scope, set()).add(name)
+    return {
+        "sites": sites,
+        "calls": {scope: sorted(names) for scope, names in calls.items()},
+        "imports": visitor.imports,
+    }
+
+
+def resolve_relative_name(name, module_name, is_package):
+    """
+    Parameters
+    ----------
+    name: str
+        "..helpers.wait"
+    module_name: str
+        module where name is imported, "tests.unit.test_a"
+    is_package: bool
+        True if module is `__init__.py`
+
+    Returns
+    -------
+    str
+        "tests.helpers.wait"
+    """
+    level = len(name) - len(name.lstrip("."))
+    if not level:
+        return name
+    parts = module_name.split(".")
+    if not is_package:
+        parts = parts[:-1]
+    if level > 1:
+        parts = parts[: -(level - 1)]
+    rest = name[level:]
+    return ".".join(parts + [rest]) if rest else ".".join(parts)
+
+
+class SleepScanner(object):
+    """
+    Finds call sites of sleep targets which tests can reach without running them
+
+    Modules are parsed with `ast`, results are cached per file by mtime and size.
+    Calls are followed through functions of the same module and imported local modules,
+    which are found in sys.modules after collection
+
+    Example of cache:
+        {
+            '/root/tests/helpers.py': [1571850000.0, 120, {"sites": [...], ...}],
+        }
+    """
+
+    def __init__(self, targets, root_dir, cache=None):
+        """
+        Parameters
+        ----------
+        targets: Iterable[str]
+            paths of module functions, "time.sleep"
+        root_dir: str
+            only modules inside are scanned
+        cache: Optional[dict]
+            results of previous scans
+        """
+        self.targets = frozenset(targets)
+        self.root_dir = os.path.join(os.path.abspath(root_dir), "")
+        self.cache = cache or {}
+        self.is_cache_changed = False
+        self.results = {}  # {module name: (path, is_package, result)}
+        self._reach = {}  # {(module name, scope): frozenset of sites}
+
+    def get_module_path(self, module_name):
+        """
+        Parameters
+        ----------
+        module_name: str
+
+        Returns
+        -------
+        Optional[str]
+            source file of local module, not imported modules are searched in sys.path
+        """
+        module = sys.modules.get(module_name)
+        path = getattr(module, "__file__", None)
+        if path:
+            path = os.path.abspath(path)
+            if path.endswith((".pyc", ".pyo")):
+                path = path[:-1]
+        elif module is None:
+            path = self.find_module_path(module_name)
+        if not path or not path.endswith(".py") or not path.startswith(self.root_dir):
+            return None
+        if "site-packages" in path:
+            return None
+        return path
+
+    def find_module_path(self, module_name):
+        """
+        Parameters
+        ----------
+        module_name: str
+
+        Returns
+        -------
+        Optional[str]
+            source file of module from local directories of sys.path
+        """
+        relative_path = os.path.join(*module_name.split("."))
+        for directory in sys.path:
+            directory = os.path.abspath(directory or os.curdir)
+            if not os.path.join(directory, "").startswith(self.root_dir):
+                continue
+            for path in (
+                relative_path + ".py",
+                os.path.join(relative_path, "__init__.py"),
+            ):
+                path = os.path.join(directory, path)
+                if os.path.isfile(path):
+                    return path
+        return None
+
+    def scan_file(self, path):
+        """
+        Parameters
+        ----------
+        path: str
+
+        Returns
+        -------
+        dict
+            result of `scan_source`
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return {"sites": [], "calls": {}, "imports": {}}
+        entry = self.cache.get(path)
+        if entry is not None and entry[0] == stat.st_mtime and entry[1] == stat.st_size:
+            return entry[2]
+        with open(path, "rb") as source_file:
+            source = source_file.read()
+        try:
+            result = scan_source(source, path, self.targets)
+        except (SyntaxError, ValueError):
+            result = {"sites": [], "calls": {}, "imports": {}}
+        self.cache[path] = [stat.st_mtime, stat.st_size, result]
+        self.is_cache_changed = True
+        return result
+
+    def get_result(self, module_name):
+        """
+        Parameters
+        ----------
+        module_name: str
+
+        Returns
+        -------
+        Optional[Tuple[str, bool, dict]]
+            path, is package and result of scanning, None for not local modules
+        """
+        if module_name not in self.results:
+            path = self.get_module_path(module_name)
+            if path is None:
+                self.results[module_name] = None
+            else:
+                is_package = os.path.basename(path) == "__init__.py"
+                self.results[module_name] = (path, is_package, self.scan_file(path))
+        return self.results[module_name]
+
+    def resolve_call(self, module_name, is_package, result, scope, name):
+        """
+        Parameters
+        ----------
+        module_name: str
+        is_package: bool
+        result: dict
+        scope: str
+            function which calls
+        name: str
+            dotted name of called object
+
+        Returns
+        -------
+        List[Tuple[str, str]]
+            candidates of called functions: [("tests.helpers", "wait")]
+        """
+        head, _, rest = name.partition(".")
+        if head in ("self", "cls") and "." in scope and rest:
+            return [(module_name, "{}.{}".format(scope.partition(".")[0], rest))]
+        absolute = get_binding(result["imports"], scope, name)
+        if absolute is None:
+            return [(module_name, name)]
+        parts = resolve_relative_name(absolute, module_name, is_package).split(".")
+        return [
+            (".".join(parts[:index]), ".".join(parts[index:]))
+            for index in range(len(parts) - 1, 0, -1)
+        ]
+
+    def get_sites(self, module_name, scope):
+        """
+        Parameters
+        ----------
+        module_name: str
+        scope: str
+            name of function or "Class.method"
+
+        Returns
+        -------
+        frozenset[Tuple[str, int, str, str]]
+            reachable call sites: (path, lineno, scope, target)
+        """
+        sites, _ = self._get_sites((module_name, scope), set())
+        return sites
+
+    def _get_sites(self, key, stack):
+        """
+        Results cut short by recursion aren't cached: when `a` calls `b` and `b` calls `a`,
+        sites of `b` reached from `a` miss the ones of `a`
+
+        Parameters
+        ----------
+        key: Tuple[str, str]
+            module name and scope
+        stack: set
+            keys which are being followed
+
+        Returns
+        -------
+        Tuple[frozenset, set]
+            reachable call sites and keys of the stack which weren't followed
+        """
+        if key in self._reach:
+            return self._reach[key], set()
+        if key in stack:
+            return frozenset(), set([key])
+        module_name, scope = key
+        module_result = self.get_result(module_name)
+        if module_result is None:
+            return frozenset(), set()
+        path, is_package, result = module_result
+        stack.add(key)
+        sites = set(
+            (path, lineno, site_scope, target)
+            for lineno, site_scope, target in result["sites"]
+            if site_scope == scope
+        )
+        cut_keys = set()
+        for name in result["calls"].get(scope, ()):
+            for callee in self.resolve_call(
+                module_name, is_package, result, scope, name
+            ):
+                callee_sites, callee_cut_keys = self._get_sites(callee, stack)
+                sites.update(callee_sites)
+                cut_keys.update(callee_cut_keys)
+        stack.discard(key)
+        cut_keys.discard(key)
+        sites = frozenset(sites)
+        if not cut_keys:
+            self._reach[key] = sites
+        return sites, cut_keys
+
+    def get_function_sites(self, function):
+        """
+        Parameters
+        ----------
+        function: Callable
+            test function or fixture
+
+        Returns
+        -------
+        frozenset[Tuple[str, int, str, str]]
+        """
+        module_name = getattr(function, "__module__", None)
+        name = getattr(function, "__qualname__", None) or getattr(
+            function, "__name__", None
+        )
+        if not module_name or not name:
+            return frozenset()
+        return self.get_sites(module_name, name)
+
+    def get_all_sites(self):
+        """
+        Returns
+        -------
+        List[Tuple[str, int, str, str]]
+            all call sites of scanned modules
+        """
+        sites = set()
+        for module_result in self.results.values():
+            if module_result is None:
+                continue
+            path, _, result = module_result
+            for lineno, scope, target in result["sites"]:
+                sites.add((path, lineno, scope, target))
+        return sorted(sites)
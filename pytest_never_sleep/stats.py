@@ -0,0 +1,459 @@
+import time
+from array import array
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+DEFAULT_AUDIT_BUFFER_SIZE = 4096
+
+
+class SleepStats(object):
+    """
+    Time which was really spent in `time.sleep` per test,
+    count of not allowed calls and time which was scaled away by `--sleep-scale`
+
+    Example of data:
+        {
+            'tests/test_a.py::test_one': [1.002, 1],
+            'tests/test_a.py::test_two': [0.305, 3],
+        }
+    """
+
+    def __init__(self):
+        self.is_recording = False
+        self.current = None
+        self.tests = {}
+        self.executed = set()
+        self.violations = {}
+        self.scaled = {}
+        self.total_seconds = 0.0
+
+    def start(self, nodeid):
+        """
+        All next records will be attached to this test
+
+        Parameters
+        ----------
+        nodeid: str
+        """
+        self.current = nodeid
+
+    def stop(self):
+        """
+        Sleeps outside of tests are not recorded
+        """
+        self.current = None
+
+    def record(self, seconds):
+        """
+        Parameters
+        ----------
+        seconds: float
+            really slept time
+        """
+        if self.current is None:
+            return
+        record = self.tests.get(self.current)
+        if record is None:
+            record = self.tests[self.current] = [0.0, 0]
+        record[0] += seconds
+        record[1] += 1
+        self.total_seconds += seconds
+
+    def get_seconds(self, nodeid):
+        """
+        Parameters
+        ----------
+        nodeid: str
+
+        Returns
+        -------
+        float
+            really slept time of the test
+        """
+        record = self.tests.get(nodeid)
+        return record[0] if record is not None else 0.0
+
+    def record_executed(self, nodeid):
+        """
+        Tests which ran without sleeping don't have records, but they are stored in the profile
+
+        Parameters
+        ----------
+        nodeid: str
+        """
+        self.executed.add(nodeid)
+
+    def record_violation(self):
+        """
+        Counts not allowed call of `time.sleep` in the running test
+        """
+        if self.current is None:
+            return
+        self.violations[self.current] = self.violations.get(self.current, 0) + 1
+
+    def record_scaled(self, seconds):
+        """
+        Parameters
+        ----------
+        seconds: float
+            requested time which wasn't slept because of scaling
+        """
+        if self.current is None:
+            return
+        self.scaled[self.current] = self.scaled.get(self.current, 0.0) + seconds
+
+    def top(self, limit=None):
+        """
+        Parameters
+        ----------
+        limit: Optional[int]
+
+        Returns
+        -------
+        List[Tuple[str, float, int]]
+            [("tests/test_a.py::test_one", 1.002, 1)]
+        """
+        records = sorted(
+            (
+                (nodeid, seconds, calls)
+                for nodeid, (seconds, calls) in self.tests.items()
+            ),
+            key=lambda record: record[1],
+            reverse=True,
+        )
+        return records[:limit]
+
+    def to_dict(self):
+        """
+        Returns
+        -------
+        dict
+            JSON serializable data
+        """
+        return {
+            "is_recording": self.is_recording,
+            "total_seconds": sum(seconds for seconds, _ in self.tests.values()),
+            "total_calls": sum(calls for _, calls in self.tests.values()),
+            "tests": [
+                {"nodeid": nodeid, "seconds": seconds, "calls": calls}
+                for nodeid, seconds, calls in self.top()
+            ],
+            "violations": [
+                {"nodeid": nodeid, "calls": calls}
+                for nodeid, calls in sorted(self.violations.items())
+            ],
+            "scaled_seconds": sum(self.scaled.values()),
+            "scaled": [
+                {"nodeid": nodeid, "seconds": seconds}
+                for nodeid, seconds in sorted(self.scaled.items())
+            ],
+        }
+
+    def merge(self, data):
+        """
+        Adds records from other process, e.g. pytest-xdist worker
+
+        Parameters
+        ----------
+        data: dict
+            result of `to_dict`
+        """
+        self.is_recording = self.is_recording or data.get("is_recording", False)
+        for test in data.get("tests", []):
+            record = self.tests.setdefault(test["nodeid"], [0.0, 0])
+            record[0] += test["seconds"]
+            record[1] += test["calls"]
+            self.total_seconds += test["seconds"]
+        for violation in data.get("violations", []):
+            nodeid = violation["nodeid"]
+            self.violations[nodeid] = (
+                self.violations.get(nodeid, 0) + violation["calls"]
+            )
+        for scaled in data.get("scaled", []):
+            nodeid = scaled["nodeid"]
+            self.scaled[nodeid] = self.scaled.get(nodeid, 0.0) + scaled["seconds"]
+
+
+def find_regressions(profile, baseline, tolerance):
+    """
+    Parameters
+    ----------
+    profile: Dict[str, List[float, int]]
+        current sleeping time and calls per test, `SleepStats.tests`
+    baseline: Dict[str, List[float, int]]
+        stored profile of previous runs
+    tolerance: float
+        seconds which test can additionally sleep
+
+    Returns
+    -------
+    List[Tuple[str, float, float]]
+        tests which sleep longer than before: [(nodeid, before, now)],
+        the biggest growth goes first
+    """
+    regressions = []
+    for nodeid, (seconds, _) in profile.items():
+        before = baseline.get(nodeid, (0.0, 0))[0]
+        if seconds > before + tolerance:
+            regressions.append((nodeid, before, seconds))
+    return sorted(regressions, key=lambda record: record[1] - record[2])
+
+
+def get_process_time():
+    """
+    Returns
+    -------
+    float
+        CPU time of all threads of the process
+    """
+    process_time = getattr(time, "process_time", None)
+    if process_time is not None:
+        return process_time()
+    if resource is not None:  # Python 2
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        return usage.ru_utime + usage.ru_stime
+    return time.clock()  # pylint: disable=no-member
+
+
+class IdleDetector(object):
+    """
+    Tests which spent most of their wall time without CPU and outside of `time.sleep`,
+    e.g. waiting on `Event.wait`, sockets or C extensions which can't be patched
+
+    Example of data:
+        {
+            'tests/test_a.py::test_one': [2.1, 0.05, 0.0],  # wall, cpu and slept seconds
+        }
+    """
+
+    def __init__(self, ratio, min_seconds=0.0):
+        """
+        Parameters
+        ----------
+        ratio: float
+            part of wall time which test can wait unseen by the plugin
+        min_seconds: float
+            shorter unseen waits aren't reported
+        """
+        self.ratio = ratio
+        self.min_seconds = min_seconds
+        self.tests = {}
+        self._start = None
+
+    def start(self, wall_time):
+        """
+        Parameters
+        ----------
+        wall_time: float
+            real `time.perf_counter` at the start of test
+        """
+        self._start = (wall_time, get_process_time())
+
+    def stop(self, nodeid, wall_time, slept):
+        """
+        Parameters
+        ----------
+        nodeid: str
+        wall_time: float
+            real `time.perf_counter` at the end of test
+        slept: float
+            time which was seen by the plugin in `time.sleep`
+        """
+        if self._start is None:
+            return
+        wall = wall_time - self._start[0]
+        cpu = get_process_time() - self._start[1]
+        self._start = None
+        idle = wall - cpu - slept
+        if idle >= self.min_seconds and idle > wall * self.ratio:
+            self.tests[nodeid] = [wall, cpu, slept]
+
+    def top(self):
+        """
+        Returns
+        -------
+        List[Tuple[str, float, float, float]]
+            [(nodeid, wall, cpu, slept)], the longest unseen waits go first
+        """
+        return sorted(
+            (
+                (nodeid, wall, cpu, slept)
+                for nodeid, (wall, cpu, slept) in self.tests.items()
+            ),
+            key=lambda record: record[2] + record[3] - record[1],
+        )
+
+    def report(self):
+        """
+        Returns
+        -------
+        List[dict]
+            JSON serializable data
+        """
+        return [
+            {"nodeid": nodeid, "wall": wall, "cpu": cpu, "slept": slept}
+            for nodeid, wall, cpu, slept in self.top()
+        ]
+
+    def merge(self, data):
+        """
+        Adds tests from other process, e.g. pytest-xdist worker
+
+        Parameters
+        ----------
+        data: List[dict]
+            result of `report`
+        """
+        for test in data:
+            self.tests[test["nodeid"]] = [test["wall"], test["cpu"], test["slept"]]
+
+
+class SleepAudit(object):  # pylint: disable=too-many-instance-attributes
+    """
+    Call sites of not allowed `time.sleep` deduplicated by code object and line
+
+    Events are written into preallocated buffer and aggregated by sites when it's full,
+    so memory doesn't grow with count of calls
+
+    Example of report:
+        [
+            {
+                'path': '/root/tests/helpers.py',
+                'lineno': 12,
+                'name': 'wait_for',
+                'calls': 120,
+                'seconds': 12.0,
+                'tests': ['tests/test_a.py::test_one', 'tests/test_a.py::test_two'],
+            },
+        ]
+    """
+
+    def __init__(self, capacity=DEFAULT_AUDIT_BUFFER_SIZE):
+        """
+        Parameters
+        ----------
+        capacity: int
+            count of events which are kept before aggregation
+        """
+        self.capacity = capacity
+        self.sites = []  # [(path, lineno, name)]
+        self.calls = []
+        self.seconds = []
+        self.tests = []  # [set of nodeids]
+        self._site_ids = {}  # {(code, lineno): site_id}
+        self._location_ids = {}  # {(path, lineno, name): site_id}
+        self._test_ids = {}
+        self._test_names = []
+        self._buffer_sites = array("l", [0]) * capacity
+        self._buffer_tests = array("l", [0]) * capacity
+        self._buffer_seconds = array("d", [0.0]) * capacity
+        self._size = 0
+
+    def _get_site_id(self, location):
+        site_id = self._location_ids.get(location)
+        if site_id is None:
+            site_id = self._location_ids[location] = len(self.sites)
+            self.sites.append(location)
+            self.calls.append(0)
+            self.seconds.append(0.0)
+            self.tests.append(set())
+        return site_id
+
+    def _get_test_id(self, nodeid):
+        if nodeid is None:
+            return -1
+        test_id = self._test_ids.get(nodeid)
+        if test_id is None:
+            test_id = self._test_ids[nodeid] = len(self._test_names)
+            self._test_names.append(nodeid)
+        return test_id
+
+    def record(self, frame, seconds, nodeid):
+        """
+        Parameters
+        ----------
+        frame: frame
+            frame which called `time.sleep`
+        seconds: int | float
+            requested time of sleeping
+        nodeid: Optional[str]
+            running test
+        """
+        code = frame.f_code
+        key = (code, frame.f_lineno)
+        site_id = self._site_ids.get(key)
+        if site_id is None:
+            location = (code.co_filename, frame.f_lineno, code.co_name)
+            site_id = self._site_ids[key] = self._get_site_id(location)
+
+        index = self._size
+        self._buffer_sites[index] = site_id
+        self._buffer_tests[index] = self._get_test_id(nodeid)
+        self._buffer_seconds[index] = seconds
+        self._size = index + 1
+        if self._size == self.capacity:
+            self.flush()
+
+    def flush(self):
+        """
+        Aggregates buffered events by call sites
+        """
+        for index in range(self._size):
+            site_id = self._buffer_sites[index]
+            self.calls[site_id] += 1
+            self.seconds[site_id] += self._buffer_seconds[index]
+            test_id = self._buffer_tests[index]
+            if test_id >= 0:
+                self.tests[site_id].add(self._test_names[test_id])
+        self._size = 0
+
+    def report(self, limit=None):
+        """
+        Parameters
+        ----------
+        limit: Optional[int]
+
+        Returns
+        -------
+        List[dict]
+            call sites ranked by requested time of sleeping and count of calls
+        """
+        self.flush()
+        site_ids = sorted(
+            range(len(self.sites)),
+            key=lambda site_id: (self.seconds[site_id], self.calls[site_id]),
+            reverse=True,
+        )
+        report = []
+        for site_id in site_ids[:limit]:
+            path, lineno, name = self.sites[site_id]
+            report.append(
+                {
+                    "path": path,
+                    "lineno": lineno,
+                    "name": name,
+                    "calls": self.calls[site_id],
+                    "seconds": self.seconds[site_id],
+                    "tests": sorted(self.tests[site_id]),
+                }
+            )
+        return report
+
+    def merge(self, sites):
+        """
+        Adds call sites from other process, e.g. pytest-xdist worker,
+        they are deduplicated by path, line and name
+
+        Parameters
+        ----------
+        sites: List[dict]
+            result of `report`
+        """
+        for site in sites:
+            site_id = self._get_site_id((site["path"], site["lineno"], site["name"]))
+            self.calls[site_id] += site["calls"]
+            self.seconds[site_id] += site["seconds"]
+            self.tests[site_id].update(site["tests"])
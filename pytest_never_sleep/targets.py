@@ -0,0 +1,281 @@
+import importlib
+import types
+
+TIME_SLEEP = "time.sleep"
+ASYNCIO_SLEEP = "asyncio.sleep"
+DEFAULT_TARGETS = (TIME_SLEEP, ASYNCIO_SLEEP)
+
+
+def is_queue_get_blocking(args, kwargs):
+    """
+    `Queue.get(block=False)` doesn't wait and ignores timeout
+
+    Parameters
+    ----------
+    args: tuple
+    kwargs: dict
+
+    Returns
+    -------
+    bool
+    """
+    if "block" in kwargs:
+        return bool(kwargs["block"])
+    return len(args) < 2 or bool(args[1])
+
+
+# {path: (position, name, is_blocking)}: position and name of the argument which holds seconds,
+# position counts `self` for methods, and predicate of calls which wait
+KNOWN_TARGETS = {
+    TIME_SLEEP: (0, None, None),
+    ASYNCIO_SLEEP: (0, "delay", None),
+    "threading.Event.wait": (1, "timeout", None),
+    "threading.Condition.wait": (1, "timeout", None),
+    "queue.Queue.get": (2, "timeout", is_queue_get_blocking),
+    "Queue.Queue.get": (2, "timeout", is_queue_get_blocking),  # Python 2
+    "select.select": (3, "timeout", None),
+}
+
+
+def resolve_path(path):
+    """
+    Parameters
+    ----------
+    path: str
+        dotted path to function, e.g. "threading.Event.wait"
+
+    Returns
+    -------
+    Tuple[module | type, Callable]
+        owner of attribute and its value
+
+    Raises
+    ------
+    ImportError
+    AttributeError
+    """
+    parts = path.split(".")
+    for index in range(len(parts) - 1, 0, -1):
+        try:
+            owner = importlib.import_module(".".join(parts[:index]))
+        except ImportError:
+            continue
+        for name in parts[index:-1]:
+            owner = getattr(owner, name)
+        if isinstance(owner, type):
+            # keeps functions of classes unbound on Python 2
+            original = vars(owner).get(parts[-1])
+            if original is None:
+                original = getattr(owner, parts[-1])
+        else:
+            original = getattr(owner, parts[-1])
+        return owner, original
+    raise ImportError("No module for {}".format(path))
+
+
+class Target(object):
+    """
+    Blocking callable which is checked the same way as `time.sleep`
+
+    Module functions are replaced in the module itself and in all modules
+    which imported them by `from module import function`,
+    methods are replaced only in the class
+    """
+
+    def __init__(
+        self, path, timeout_position=None, timeout_name=None, is_blocking=None
+    ):
+        """
+        Parameters
+        ----------
+        path: str
+            "threading.Event.wait"
+        timeout_position: Optional[int]
+            position of argument which holds seconds, includes `self` for methods
+        timeout_name: Optional[str]
+            name of argument which holds seconds
+        is_blocking: Optional[Callable]
+            it's called with args and kwargs of call and returns False
+            if the call doesn't wait regardless of timeout, e.g. `Queue.get(block=False)`
+        """
+        if timeout_position is None and timeout_name is None:
+            timeout_position, timeout_name, known_is_blocking = KNOWN_TARGETS.get(
+                path, (0, None, None)
+            )
+            is_blocking = is_blocking or known_is_blocking
+        self.path = path
+        self.name = path.rpartition(".")[2]
+        self.timeout_position = timeout_position
+        self.timeout_name = timeout_name
+        self.is_blocking = is_blocking
+        self.owner = None
+        self.original = None
+
+    def __repr__(self):
+        return "<Target {}>".format(self.path)
+
+    def resolve(self):
+        """
+        Imports owner of the callable
+
+        Returns
+        -------
+        bool
+            False if the callable isn't available
+        """
+        try:
+            self.owner, self.original = resolve_path(self.path)
+        except (ImportError, AttributeError):
+            return False
+        return True
+
+    @property
+    def is_function(self):
+        """
+        Returns
+        -------
+        bool
+            True for module functions, they can be imported by `from module import function`
+        """
+        return isinstance(self.owner, types.ModuleType)
+
+    def get_timeout(self, args, kwargs):
+        """
+        Parameters
+        ----------
+        args: tuple
+        kwargs: dict
+
+        Returns
+        -------
+        Optional[int | float]
+            requested seconds, None if call waits without timeout or doesn't wait
+        """
+        if self.is_blocking is not None and not self.is_blocking(args, kwargs):
+            return None
+        if self.timeout_name is not None and self.timeout_name in kwargs:
+            return kwargs[self.timeout_name]
+        if self.timeout_position is not None and len(args) > self.timeout_position:
+            return args[self.timeout_position]
+        return None
+
+    def replace_timeout(self, args, kwargs, seconds):
+        """
+        Parameters
+        ----------
+        args: tuple
+        kwargs: dict
+        seconds: int | float
+
+        Returns
+        -------
+        Tuple[tuple, dict]
+            arguments of call with other timeout
+        """
+        if self.timeout_name is not None and self.timeout_name in kwargs:
+            kwargs = dict(kwargs)
+            kwargs[self.timeout_name] = seconds
+        elif self.timeout_position is not None and len(args) > self.timeout_position:
+            args = list(args)
+            args[self.timeout_position] = seconds
+            args = tuple(args)
+        return args, kwargs
+
+
+class TargetRegistry(object):
+    """
+    Targets with their fake implementations
+
+    Example of data:
+        {
+            id(<built-in function sleep>): (<Target time.sleep>, <FakeSleep>),
+            id(<function Event.wait>): (<Target threading.Event.wait>, <function Event.wait>),
+        }
+    """
+
+    def __init__(self):
+        self.targets = []
+        self.by_original = {}
+        self.by_fake = {}
+        self.names = ()
+
+    def __iter__(self):
+        return iter(self.targets)
+
+    def __contains__(self, path):
+        return any(target.path == path for target in self.targets)
+
+    def add(self, target, fake):
+        """
+        Parameters
+        ----------
+        target: Target
+            already resolved target
+        fake: Callable
+        """
+        if target.path in self:
+            return
+        self.targets.append(target)
+        self.by_original[id(target.original)] = (target, fake)
+        self.by_fake[id(fake)] = (target, fake)
+        if target.is_function and target.name not in self.names:
+            self.names += (target.name,)
+
+    def remove(self, path):
+        """
+        Parameters
+        ----------
+        path: str
+            "time.monotonic"
+        """
+        for target in self.targets:
+            if target.path == path:
+                break
+        else:
+            return
+        self.targets.remove(target)
+        _, fake = self.by_original.pop(id(target.original))
+        self.by_fake.pop(id(fake), None)
+        names = ()
+        for other in self.targets:
+            if other.is_function and other.name not in names:
+                names += (other.name,)
+        self.names = names
+
+    def get_fake(self, original):
+        """
+        Parameters
+        ----------
+        original: Callable
+
+        Returns
+        -------
+        Optional[Callable]
+        """
+        _, fake = self.by_original.get(id(original), (None, None))
+        return fake
+
+    def get_original(self, fake):
+        """
+        Parameters
+        ----------
+        fake: Callable
+
+        Returns
+        -------
+        Optional[Callable]
+        """
+        target, _ = self.by_fake.get(id(fake), (None, None))
+        return target.original if target is not None else None
+
+    def patch_owners(self, ledger):
+        """
+        Replaces targets in modules and classes which define them
+
+        Parameters
+        ----------
+        ledger: pytest_never_sleep.ledger.PatchLedger
+        """
+        for target in self.targets:
+            fake = self.by_original[id(target.original)][1]
+            ledger.patch(target.owner, target.name, target.original, fake)
@@ -0,0 +1,236 @@
+import contextlib
+import datetime
+import heapq
+import itertools
+import threading
+import time
+
+_true_datetime = datetime.datetime
+_true_thread_join = threading.Thread.join
+# `threading.Condition` is a factory function in Python 2
+_true_condition_wait = type(threading.Condition()).wait
+
+DEFAULT_GRACE = 0.05
+
+TIME_FUNCTIONS = ("time", "monotonic", "perf_counter")
+TIME_NS_FUNCTIONS = ("time_ns", "monotonic_ns", "perf_counter_ns")
+_true_time_functions = {
+    name: getattr(time, name)
+    for name in TIME_FUNCTIONS + TIME_NS_FUNCTIONS
+    if hasattr(time, name)
+}
+DATETIME = "datetime.datetime"
+# targets which are replaced by virtual ones in fast forward mode
+CLOCK_TARGETS = tuple("time.{}".format(name) for name in _true_time_functions) + (
+    DATETIME,
+)
+
+
+class _FakeDatetimeMeta(type):
+    def __instancecheck__(cls, instance):
+        return isinstance(instance, _true_datetime)
+
+
+def _now(cls, tz=None):
+    return _true_datetime.now(tz) + datetime.timedelta(seconds=cls.clock.offset)
+
+
+def _utcnow(cls):
+    return _true_datetime.utcnow() + datetime.timedelta(seconds=cls.clock.offset)
+
+
+def _today(cls):
+    return cls.now()
+
+
+FakeDatetime = _FakeDatetimeMeta(
+    "FakeDatetime",
+    (_true_datetime,),
+    {
+        "clock": None,
+        "never_sleep_original": _true_datetime,
+        "now": classmethod(_now),
+        "utcnow": classmethod(_utcnow),
+        "today": classmethod(_today),
+    },
+)
+
+
+class VirtualClock(object):
+    """
+    Offset which is added to `time.time`, `time.monotonic`, `time.perf_counter`
+    and `datetime.datetime.now` while the clock is installed
+
+    Only attributes of `time` and `datetime` modules are replaced by `install`,
+    bindings like `from time import monotonic` are replaced by `FakeSleep`
+    which registers `CLOCK_TARGETS` with fakes of the clock
+    """
+
+    def __init__(self):
+        self.offset = 0.0
+        self.is_installed = False
+        self.fakes = {
+            "time.{}".format(name): self._make_time_function(name)
+            for name in _true_time_functions
+        }
+        self.fakes[DATETIME] = FakeDatetime
+
+    def advance(self, seconds):
+        """
+        Parameters
+        ----------
+        seconds: int | float
+        """
+        self.offset += seconds
+
+    def _make_time_function(self, name):
+        true_function = _true_time_functions[name]
+        if name in TIME_NS_FUNCTIONS:
+
+            def virtual_time_ns():
+                return true_function() + int(self.offset * 1e9)
+
+            virtual_time_ns.never_sleep_original = true_function
+            return virtual_time_ns
+
+        def virtual_time():
+            return true_function() + self.offset
+
+        virtual_time.never_sleep_original = true_function
+        return virtual_time
+
+    def install(self):
+        """
+        Replaces `time` functions and `datetime.datetime` by virtual ones
+        """
+        if self.is_installed:
+            return
+        for name in _true_time_functions:
+            setattr(time, name, self.fakes["time.{}".format(name)])
+        FakeDatetime.clock = self
+        datetime.datetime = FakeDatetime
+        self.is_installed = True
+
+    def uninstall(self):
+        """
+        Returns back origin `time` functions and `datetime.datetime`
+        """
+        if not self.is_installed:
+            return
+        for name, true_function in _true_time_functions.items():
+            setattr(time, name, true_function)
+        datetime.datetime = _true_datetime
+        FakeDatetime.clock = None
+        self.is_installed = False
+
+
+class VirtualScheduler(object):  # pylint: disable=too-many-instance-attributes
+    """
+    Discrete-event scheduler of sleeping threads
+
+    Every thread which sleeps registers its virtual deadline and blocks,
+    once all participating threads are blocked the one with the nearest deadline
+    is woken and the clock jumps to its deadline. Threads with equal deadlines
+    are woken in order of calls. So producers and consumers with different intervals
+    run instantly and always in the same order as with the real clock
+
+    Threads take part since they were started or since their first sleep
+    until they finish or `reset` is called, the thread which starts others
+    takes part too, it's considered blocked while it joins them.
+    If some participant doesn't sleep during `grace` seconds of real time,
+    e.g. it waits on a lock, the nearest sleeper is woken anyway
+    """
+
+    def __init__(self, clock, grace=DEFAULT_GRACE):
+        """
+        Parameters
+        ----------
+        clock: VirtualClock
+        grace: int | float
+            real seconds to wait for participants which are busy
+        """
+        self.clock = clock
+        self.grace = grace
+        self._condition = threading.Condition()
+        self._counter = itertools.count()
+        self._sleepers = []  # heap of [deadline, order, thread]
+        self._participants = set()
+        self._waiting = set()
+        self._generation = 0
+
+    def reset(self):
+        """
+        Forgets participants, sleeping threads aren't affected
+        """
+        with self._condition:
+            self._participants = set(entry[2] for entry in self._sleepers)
+
+    def register(self, thread):
+        """
+        Adds thread which is going to be started, so sleepers wait for it
+
+        Parameters
+        ----------
+        thread: threading.Thread
+        """
+        with self._condition:
+            self._participants.add(thread)
+
+    @contextlib.contextmanager
+    def waiting(self):
+        """
+        The current thread is considered blocked inside, e.g. while it joins other threads
+        """
+        thread = threading.current_thread()
+        with self._condition:
+            self._waiting.add(thread)
+            self._condition.notify_all()
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._waiting.discard(thread)
+
+    def _is_all_blocked(self):
+        # not started threads have no ident yet and are still waited for
+        self._participants = set(
+            thread
+            for thread in self._participants
+            if thread.ident is None or thread.is_alive()
+        )
+        blocked = set(entry[2] for entry in self._sleepers)
+        return self._participants <= blocked | self._waiting
+
+    def _wake(self, entry):
+        heapq.heappop(self._sleepers)
+        self.clock.offset = max(self.clock.offset, entry[0])
+        self._generation += 1
+        self._condition.notify_all()
+
+    def sleep(self, seconds):
+        """
+        Blocks the current thread until its virtual deadline is the nearest one
+
+        Parameters
+        ----------
+        seconds: int | float
+        """
+        thread = threading.current_thread()
+        with self._condition:
+            entry = [self.clock.offset + seconds, next(self._counter), thread]
+            heapq.heappush(self._sleepers, entry)
+            self._participants.add(thread)
+            self._generation += 1
+            self._condition.notify_all()
+            is_stalled = False
+            while True:
+                if self._sleepers[0] is not entry:
+                    _true_condition_wait(self._condition)
+                    is_stalled = False
+                    continue
+                if is_stalled or self._is_all_blocked():
+                    self._wake(entry)
+                    return
+                generation = self._generation
+                _true_condition_wait(self._condition, self.grace)
+                is_stalled = self._generation == generation
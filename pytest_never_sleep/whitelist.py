@@ -0,0 +1,181 @@
+import fnmatch
+import os
+import re
+
+GLOB_CHARS = "*?["
+
+
+def is_path_pattern(pattern):
+    """
+    Parameters
+    ----------
+    pattern: str
+        module prefix "tests.helpers" or path "tests/helpers/*.py"
+
+    Returns
+    -------
+    bool
+    """
+    return (
+        "/" in pattern
+        or os.sep in pattern
+        or pattern.endswith(".py")
+        or any(char in pattern for char in GLOB_CHARS)
+    )
+
+
+def resolve_pattern(pattern, root_dir):
+    """
+    Makes relative path patterns absolute, module prefixes and patterns
+    which start with a glob, e.g. "*/vendor/*", are returned as is
+
+    Parameters
+    ----------
+    pattern: str
+    root_dir: str
+
+    Returns
+    -------
+    str
+    """
+    if not is_path_pattern(pattern) or os.path.isabs(pattern):
+        return pattern
+    if pattern[0] in GLOB_CHARS:
+        return pattern
+    return os.path.normpath(os.path.join(root_dir, pattern))
+
+
+def build_prefix_regex(prefixes):
+    """
+    Builds regex from a prefix trie, so matching doesn't depend on count of prefixes
+
+    Parameters
+    ----------
+    prefixes: Iterable[str]
+
+    Returns
+    -------
+    Optional[str]
+        None if there are no prefixes
+
+    Example:
+        >>> build_prefix_regex(["tests.a", "tests.b", "tests.a.b"])
+        'tests\\.(?:a|b)'
+    """
+    trie = {}
+    for prefix in prefixes:
+        node = trie
+        for char in prefix:
+            if "" in node:
+                break
+            node = node.setdefault(char, {})
+        else:
+            # the shorter prefix already covers all longer ones
+            node.clear()
+            node[""] = {}
+    if not trie:
+        return None
+    return _trie_to_regex(trie)
+
+
+def _trie_to_regex(node):
+    if "" in node:
+        return ""
+    alternatives = [
+        re.escape(char) + _trie_to_regex(child) for char, child in sorted(node.items())
+    ]
+    if len(alternatives) == 1:
+        return alternatives[0]
+    return "(?:{})".format("|".join(alternatives))
+
+
+class Whitelist(object):
+    """
+    Whitelist compiled once into regexes
+
+    Module prefixes are matched against module name of caller,
+    paths and globs are matched against file name of caller's code
+    """
+
+    def __init__(self, patterns=()):
+        """
+        Parameters
+        ----------
+        patterns: Iterable[str]
+            "tests.helpers", "/root/scripts/", "*/vendor/*.py"
+        """
+        self.patterns = tuple(patterns)
+        modules = []
+        path_prefixes = []
+        globs = []
+        root_dir = os.getcwd()
+        for pattern in self.patterns:
+            if not is_path_pattern(pattern):
+                modules.append(pattern)
+                continue
+            pattern = resolve_pattern(pattern, root_dir)
+            if any(char in pattern for char in GLOB_CHARS):
+                globs.append(fnmatch.translate(pattern))
+            elif pattern.endswith(".py"):
+                path_prefixes.append(pattern)
+            else:
+                path_prefixes.append(os.path.join(pattern, ""))
+
+        module_regex = build_prefix_regex(modules)
+        self._module_match = None
+        if module_regex is not None:
+            self._module_match = re.compile(module_regex).match
+
+        path_regexes = globs
+        path_regex = build_prefix_regex(path_prefixes)
+        if path_regex is not None:
+            path_regexes = [path_regex] + globs
+        self._path_match = None
+        if path_regexes:
+            self._path_match = re.compile(
+                "|".join("(?:{})".format(regex) for regex in path_regexes)
+            ).match
+
+    def __bool__(self):
+        return bool(self.patterns)
+
+    __nonzero__ = __bool__
+
+    def match_module(self, name):
+        """
+        Parameters
+        ----------
+        name: str
+
+        Returns
+        -------
+        bool
+        """
+        return self._module_match is not None and self._module_match(name) is not None
+
+    def match_path(self, path):
+        """
+        Parameters
+        ----------
+        path: str
+
+        Returns
+        -------
+        bool
+        """
+        return self._path_match is not None and self._path_match(path) is not None
+
+    def match(self, name, path):
+        """
+        Parameters
+        ----------
+        name: str
+            module name
+        path: str
+            file name
+
+        Returns
+        -------
+        bool
+        """
+        return self.match_module(name) or self.match_path(path)
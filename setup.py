@@ -25,8 +25,20 @@ setup(
     keywords=["py.test", "pytest", "without sleep", "mock time.sleep"],
     py_modules=[
         "pytest_never_sleep.plugin",
+        "pytest_never_sleep.async_sleep",
+        "pytest_never_sleep.cache",
+        "pytest_never_sleep.child",
         "pytest_never_sleep.hooks",
+        "pytest_never_sleep.import_hook",
+        "pytest_never_sleep.ledger",
         "pytest_never_sleep.never_sleep",
+        "pytest_never_sleep.policy",
+        "pytest_never_sleep.report",
+        "pytest_never_sleep.scan",
+        "pytest_never_sleep.stats",
+        "pytest_never_sleep.targets",
+        "pytest_never_sleep.virtual_clock",
+        "pytest_never_sleep.whitelist",
     ],
     packages=find_packages(exclude=["tests*"]),
     install_requires=["pytest>=3.5.1"],
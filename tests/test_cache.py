@@ -0,0 +1,90 @@
+import gc
+import time
+import types
+
+import pytest
+
+from pytest_never_sleep.cache import Cache
+from pytest_never_sleep.never_sleep import FakeSleep, _true_time_sleep
+
+
+@pytest.fixture
+def module():
+    module = types.ModuleType("never_sleep_fake_module")
+    module.sleep = _true_time_sleep
+    module.other = 1
+    return module
+
+
+class TestCache(object):
+    def test_miss_for_unknown_module(self, module):
+        cache = Cache(FakeSleep().targets)
+        assert module not in cache
+
+    def test_hit_for_module_without_target_attributes(self):
+        cache = Cache(FakeSleep().targets)
+        module = types.ModuleType("never_sleep_empty_module")
+        assert cache.add(module) == []
+        assert module in cache
+
+    def test_hit_after_add(self, module):
+        cache = Cache(FakeSleep().targets)
+        assert cache.add(module) == [("sleep", _true_time_sleep)]
+        assert module in cache
+
+    def test_miss_when_namespace_changed(self, module):
+        cache = Cache(FakeSleep().targets)
+        cache.add(module)
+        module.new_attribute = 1
+        assert module not in cache
+
+    def test_miss_when_sleep_rebound(self, module):
+        cache = Cache(FakeSleep().targets)
+        cache.add(module)
+        module.sleep = lambda seconds: None
+        assert module not in cache
+
+    def test_module_with_the_same_name_is_other_entry(self, module):
+        cache = Cache(FakeSleep().targets)
+        cache.add(module)
+        other = types.ModuleType(module.__name__)
+        assert other not in cache
+        cache.add(other)
+        assert module in cache
+        assert other in cache
+        assert len(cache) == 2
+
+    def test_evicted_when_module_collected(self, module):
+        cache = Cache(FakeSleep().targets)
+        other = types.ModuleType("never_sleep_other_module")
+        cache.add(module)
+        cache.add(other)
+        del other
+        gc.collect()
+        assert len(cache) == 1
+        cache.evict(module)
+        assert len(cache) == 0
+
+    def test_aliases_are_found_by_identity(self, module):
+        cache = Cache(FakeSleep().targets)
+        module._pause = _true_time_sleep
+        module.time = time
+        assert sorted(cache.add(module)) == [
+            ("_pause", _true_time_sleep),
+            ("sleep", _true_time_sleep),
+        ]
+
+    def test_miss_when_alias_rebound(self, module):
+        cache = Cache(FakeSleep().targets)
+        module._pause = _true_time_sleep
+        cache.add(module)
+        module._pause = None
+        assert module not in cache
+
+    def test_info(self, module):
+        cache = Cache(FakeSleep().targets)
+        assert module not in cache
+        cache.add(module)
+        assert module in cache
+        assert module in cache
+        assert cache.info() == {"size": 1, "hits": 2, "misses": 1}
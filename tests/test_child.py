@@ -0,0 +1,69 @@
+import json
+import os
+
+from pytest_never_sleep.child import (
+    ENV_ALLOW,
+    ENV_NODEID,
+    ENV_PYTHONPATH,
+    ENV_REPORT_DIR,
+    ChildPropagation,
+    ChildStats,
+)
+from pytest_never_sleep.never_sleep import FakeSleep, using_fake_time_sleep
+
+
+def test_propagation_sets_and_restores_environ():
+    fake = FakeSleep(whitelist=("tests.helpers",), allow_time_sleep=True)
+    environ = {ENV_PYTHONPATH: "src"}
+    propagation = ChildPropagation(fake, environ)
+    propagation.start()
+    report_dir = propagation.report_dir
+    assert os.path.isfile(os.path.join(report_dir, "startup", "sitecustomize.py"))
+    assert environ[ENV_PYTHONPATH] == os.pathsep.join(
+        [os.path.join(report_dir, "startup"), "src"]
+    )
+    assert environ[ENV_REPORT_DIR] == report_dir
+    assert environ[ENV_ALLOW] == "1"
+
+    with using_fake_time_sleep(fake):
+        propagation.set_test("test_a")
+    assert environ[ENV_NODEID] == "test_a"
+    assert environ[ENV_ALLOW] == "0"
+
+    propagation.stop()
+    assert environ == {ENV_PYTHONPATH: "src"}
+    assert not os.path.exists(report_dir)
+
+
+def test_propagation_collects_new_violations_once():
+    fake = FakeSleep()
+    propagation = ChildPropagation(fake, {})
+    propagation.start()
+    stats = ChildStats(propagation.report_dir)
+    stats.start("test_a")
+    stats.record(0.5)
+    stats.record_violation()
+    assert propagation.collect("test_a") == {os.getpid(): 1}
+    assert propagation.collect("test_a") == {}
+
+    stats.record(0.5)
+    stats.record_violation()
+    assert propagation.collect("test_a") == {os.getpid(): 1}
+    propagation.stop()
+    assert fake.stats.tests == {"test_a": [1.0, 2]}
+    assert fake.stats.violations == {"test_a": 2}
+
+
+def test_child_stats_throttles_writes(tmpdir):
+    stats = ChildStats(str(tmpdir))
+    stats.start("test_a")
+    stats.record(0.5)
+    stats.record(0.5)
+    assert stats.is_dirty
+
+    with open(stats.path + ".json") as report_file:
+        assert json.load(report_file)["stats"]["total_calls"] == 1
+    stats.flush()
+    assert not stats.is_dirty
+    with open(stats.path + ".json") as report_file:
+        assert json.load(report_file)["stats"]["total_calls"] == 2
@@ -0,0 +1,48 @@
+import gc
+import types
+
+from pytest_never_sleep.ledger import PatchLedger
+
+
+def original():
+    pass
+
+
+def fake():
+    pass
+
+
+def other_fake():
+    pass
+
+
+class TestPatchLedger(object):
+    def test_restore(self):
+        module = types.ModuleType("never_sleep_ledger_module")
+        module.sleep = original
+        ledger = PatchLedger()
+        ledger.patch(module, "sleep", original, fake)
+        ledger.patch(module, "sleep", fake, other_fake)
+        assert module.sleep is other_fake
+        assert len(ledger) == 1
+
+        ledger.restore()
+        assert module.sleep is original
+        assert len(ledger) == 0
+
+    def test_restore_skips_rebound_attributes(self):
+        module = types.ModuleType("never_sleep_ledger_module")
+        ledger = PatchLedger()
+        ledger.patch(module, "sleep", original, fake)
+        module.sleep = other_fake
+
+        ledger.restore()
+        assert module.sleep is other_fake
+
+    def test_drops_collected_owners(self):
+        module = types.ModuleType("never_sleep_ledger_module")
+        ledger = PatchLedger()
+        ledger.patch(module, "sleep", original, fake)
+        del module
+        gc.collect()
+        assert len(ledger) == 0
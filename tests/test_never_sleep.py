@@ -0,0 +1,144 @@
+import sys
+import time
+import types
+
+import pytest
+
+from pytest_never_sleep.never_sleep import (
+    FakeSleep,
+    TimeSleepUsageError,
+    _true_time_sleep,
+    parse_duration,
+    using_fake_time_sleep,
+)
+
+
+@pytest.fixture
+def module():
+    module = types.ModuleType("never_sleep_fake_module")
+    module.sleep = _true_time_sleep
+    module.other = 1
+    return module
+
+
+class TestFakeSleep(object):
+    def test_patch_module_refreshes_cache(self, module):
+        fake = FakeSleep(whitelist=())
+        fake.patch_module(module)
+        assert module.sleep is fake
+        assert module in fake.cache
+
+        module.sleep = _true_time_sleep
+        fake.patch_module(module)
+        assert module.sleep is fake
+
+    def test_unpatch_restores_modules_from_ledger(self, module):
+        fake = FakeSleep(whitelist=())
+        fake.patch_module(module)
+        assert module.sleep is fake
+        # module isn't in sys.modules, so only the ledger knows about it
+        fake.whitelist = (module.__name__,)
+        fake.unpatch_time_sleep()
+        assert module.sleep is _true_time_sleep
+
+    def test_whitelist_decision_is_cached_per_code(self):
+        fake = FakeSleep(whitelist=("tests.",), allow_time_sleep=False)
+        assert fake.should_use_true_sleep()
+        assert list(fake._decisions.values()) == [True]
+
+        fake.whitelist = ("other",)
+        assert not fake._decisions
+        assert not fake.should_use_true_sleep()
+
+    def test_whitelist_stack(self):
+        fake = FakeSleep(whitelist=("_pytest",), allow_time_sleep=False)
+        assert not fake.should_use_true_sleep()
+        fake.is_whitelist_stack = True
+        assert fake.should_use_true_sleep()
+
+    def test_fast_forward_advances_virtual_clock(self):
+        fake = FakeSleep(whitelist=(), allow_time_sleep=False)
+        fake.enable_fast_forward()
+        try:
+            fake.sleep(10)
+            assert fake.clock.offset == 10
+            with pytest.raises(ValueError):
+                fake.sleep(-1)
+        finally:
+            fake.disable_fast_forward()
+        assert not fake.clock.is_installed
+
+    def test_fast_forward_replaces_imported_clock(self, module):
+        true_monotonic = time.monotonic
+        module.monotonic = true_monotonic
+        sys.modules[module.__name__] = module
+        fake = FakeSleep(whitelist=(), allow_time_sleep=False)
+        fake.enable_fast_forward()
+        try:
+            fake.patch_time_sleep()
+            assert module.monotonic is fake.clock.fakes["time.monotonic"]
+            fake.sleep(10)
+            assert module.monotonic() - true_monotonic() > 9
+        finally:
+            fake.unpatch_time_sleep()
+            del sys.modules[module.__name__]
+        assert module.monotonic is true_monotonic
+        assert "time.monotonic" not in fake.targets
+
+    def test_listeners(self):
+        fake = FakeSleep(
+            whitelist=(), allow_time_sleep=True, get_message=lambda **kwargs: ""
+        )
+        calls = []
+
+        def listener(**kwargs):
+            calls.append(kwargs)
+
+        fake.add_listener(listener)
+        fake.add_listener(listener)
+        fake.sleep(0)
+        with using_fake_time_sleep(fake):
+            with pytest.raises(TimeSleepUsageError):
+                fake.sleep(1)
+        fake.remove_listener(listener)
+        fake.sleep(0)
+        assert [(call["seconds"], call["decision"]) for call in calls] == [
+            (0, "allowed"),
+            (1, "denied"),
+        ]
+        assert calls[0]["target"] == "time.sleep"
+        assert calls[0]["frame"].f_code.co_name == "test_listeners"
+        assert calls[0]["item"] is None
+
+    def test_scale_seconds(self):
+        fake = FakeSleep(allow_time_sleep=True)
+        assert fake.scale_seconds(1) == 1
+        fake.scale = 0.1
+        fake.scale_floor = 0.01
+        fake.stats.start("test_a")
+        assert fake.scale_seconds(1) == pytest.approx(0.1)
+        assert fake.scale_seconds(0.05) == 0.01
+        assert fake.scale_seconds(0.005) == 0.005
+        assert fake.scale_seconds(0) == 0
+        assert fake.stats.scaled == {"test_a": pytest.approx(0.94)}
+
+
+@pytest.mark.parametrize(
+    "value, seconds",
+    [
+        (1, 1.0),
+        ("0.5", 0.5),
+        ("50ms", 0.05),
+        ("1.5s", 1.5),
+        ("2m", 120.0),
+        (" 1S ", 1.0),
+    ],
+)
+def test_parse_duration(value, seconds):
+    assert parse_duration(value) == pytest.approx(seconds)
+
+
+@pytest.mark.parametrize("value", ["", "ms", "1h", "-1s"])
+def test_parse_duration_invalid(value):
+    with pytest.raises(ValueError):
+        parse_duration(value)
@@ -1,5 +1,15 @@
+import asyncio
+import datetime
+import json
+import os
+import sys
+import threading
+import time
+
 import pytest
 
+from pytest_never_sleep.import_hook import PatchingFinder
+
 
 class TestCommandLine(object):
     def test_execute_plugin_with_default_options(self, testdir):
@@ -32,6 +42,16 @@ class TestCommandLine(object):
         assert len(config.getoption("--whitelist")) == 1
         assert module_name in config.getoption("--whitelist")
 
+    def test_execute_plugin_with_sleep_import_hook(self, testdir):
+        config = testdir.parseconfigure("--sleep-import-hook")
+        assert config.pluginmanager.hasplugin("never_sleep")
+        assert config.getoption("--sleep-import-hook")
+
+    def test_execute_plugin_with_fast_forward_sleep(self, testdir):
+        config = testdir.parseconfigure("--fast-forward-sleep")
+        assert config.pluginmanager.hasplugin("never_sleep")
+        assert config.getoption("--fast-forward-sleep")
+
 
 class TestHooks(object):
     @pytest.fixture
@@ -74,6 +94,31 @@ class TestHooks(object):
         """
         )
 
+    @pytest.fixture
+    def create_targets_hook(self, testdir):
+        testdir.makeconftest(
+            """
+            from pytest_never_sleep.targets import Target
+
+            def pytest_never_sleep_targets():
+                print("HOOK CALLED")
+                return (Target("threading.Event.wait", 1, "timeout"),)
+        """
+        )
+
+    @pytest.mark.usefixtures("create_targets_hook")
+    def test_call_hook_pytest_never_sleep_targets(self, testdir):
+        testdir.makepyfile(
+            """
+            import threading
+
+            def test_a(): threading.Event().wait(timeout=0.01)
+            def test_b(): pass
+        """
+        )
+        res = testdir.runpytest("--disable-sleep", "-vs")
+        res.stdout.fnmatch_lines(["*HOOK CALLED*", "*1 failed, 1 passed*"])
+
     @pytest.mark.usefixtures("create_green_tests", "create_message_format_hook")
     def test_not_call_hook_pytest_never_sleep_message_format_on_green_tests(
         self, testdir
@@ -135,6 +180,60 @@ class TestAcceptance(object):
         res = testdir.runpytest("--disable-sleep", "-vs", "--whitelist", "test_a")
         res.stdout.fnmatch_lines(["*1 failed, 5 passed*"])
 
+    def test_with_ini_whitelist(self, testdir):
+        testdir.makeini(
+            """
+            [pytest]
+            never_sleep_whitelist =
+                helpers/
+                *_slow.py
+        """
+        )
+        testdir.mkpydir("helpers")
+        testdir.tmpdir.join("helpers", "wait.py").write(
+            "import time\n\ndef wait(): time.sleep(0.001)\n"
+        )
+        testdir.makepyfile(
+            test_a="""
+            from helpers.wait import wait
+
+            def test_a(): wait()
+        """,
+            test_b_slow="""
+            import time
+
+            def test_b(): time.sleep(0.001)
+        """,
+            test_c="""
+            import time
+
+            def test_c(): time.sleep(0.001)
+        """,
+        )
+        res = testdir.runpytest("--disable-sleep")
+        res.stdout.fnmatch_lines(["*1 failed, 2 passed*"])
+
+    def test_with_whitelist_stack(self, testdir):
+        testdir.makepyfile(
+            helpers="""
+            import time
+
+            def wait(): time.sleep(0.001)
+        """,
+            test_a="""
+            from helpers import wait
+
+            def test_a(): wait()
+        """,
+        )
+
+        res = testdir.runpytest("--disable-sleep", "--whitelist", "test_a")
+        res.stdout.fnmatch_lines(["*1 failed*"])
+        res = testdir.runpytest(
+            "--disable-sleep", "--whitelist", "test_a", "--whitelist-stack"
+        )
+        res.stdout.fnmatch_lines(["*1 passed*"])
+
     def test_with_allow_time_sleep_marker(self, testdir):
         testdir.makepyfile(
             """
@@ -202,3 +301,889 @@ class TestAcceptance(object):
         )
         res = testdir.runpytest()
         res.stdout.fnmatch_lines(["*1 failed, 2 passed*"])
+
+    def test_with_sleep_import_hook(self, testdir):
+        testdir.makepyfile(
+            helper="""
+            from pytest_never_sleep.never_sleep import _true_time_sleep as sleep
+
+            def do(): sleep(0.01)
+        """,
+            test_a="""
+            def test_a(): pass
+
+            def test_b():
+                from helper import do
+                do()
+        """,
+        )
+        res = testdir.runpytest("--disable-sleep", "--sleep-import-hook", "-vs")
+        res.stdout.fnmatch_lines(["*1 failed, 1 passed*"])
+        assert not [f for f in sys.meta_path if isinstance(f, PatchingFinder)]
+
+    def test_with_fast_forward_sleep(self, testdir):
+        testdir.makepyfile(
+            """
+            import datetime
+            import time
+
+            import pytest
+
+            def test_a():
+                start, start_monotonic = time.time(), time.monotonic()
+                start_datetime = datetime.datetime.now()
+                time.sleep(3600)
+                assert time.time() - start >= 3600
+                assert time.monotonic() - start_monotonic >= 3600
+                assert (datetime.datetime.now() - start_datetime).total_seconds() >= 3600
+                assert isinstance(start_datetime, datetime.datetime)
+
+            @pytest.mark.enable_time_sleep
+            def test_b():
+                start = time.time()
+                time.sleep(0.01)
+                assert time.time() - start < 3600
+        """
+        )
+        true_time, true_datetime = time.time, datetime.datetime
+        res = testdir.runpytest("--fast-forward-sleep", "-vs")
+        res.stdout.fnmatch_lines(["*2 passed*"])
+        assert time.time is true_time
+        assert datetime.datetime is true_datetime
+
+    def test_with_fast_forward_sleep_and_imported_clock(self, testdir):
+        testdir.makepyfile(
+            waiter="""
+            from datetime import datetime
+            from time import monotonic, sleep
+
+            def wait(seconds):
+                deadline = monotonic() + seconds
+                for _ in range(100):
+                    if monotonic() >= deadline:
+                        return datetime.now()
+                    sleep(0.5)
+                raise AssertionError("virtual clock doesn't move")
+        """,
+            test_a="""
+            import datetime
+
+            from waiter import wait
+
+            def test_a():
+                start = datetime.datetime.now()
+                assert (wait(2) - start).total_seconds() >= 2
+        """,
+        )
+        testdir.makeconftest("import waiter")
+        res = testdir.runpytest("--fast-forward-sleep")
+        res.stdout.fnmatch_lines(["*1 passed*"])
+
+    def test_with_sleep_report(self, testdir):
+        testdir.makepyfile(
+            """
+            import time
+
+            def test_a(): time.sleep(0.05)
+            def test_b(): time.sleep(0.001); time.sleep(0.001)
+            def test_c(): pass
+        """
+        )
+        res = testdir.runpytest(
+            "--sleep-report-top", "1", "--sleep-report-json", "report.json"
+        )
+        res.stdout.fnmatch_lines(
+            ["*never sleep: top 1 sleepiest tests*", "*0.0*s*1 calls*test_a*"]
+        )
+        assert "test_b" not in res.stdout.str()
+
+        report = json.loads(testdir.tmpdir.join("report.json").read())
+        assert report["total_calls"] == 3
+        assert [test["nodeid"] for test in report["tests"]] == [
+            "test_with_sleep_report.py::test_a",
+            "test_with_sleep_report.py::test_b",
+        ]
+
+    def test_with_sleep_audit(self, testdir):
+        testdir.makepyfile(
+            helper="""
+            import time
+
+            def wait(): time.sleep(10)
+        """,
+            test_a="""
+            from helper import wait
+
+            def test_a(): wait()
+            def test_b(): wait(); wait()
+            def test_c(): pass
+        """,
+        )
+        res = testdir.runpytest("--sleep-audit", "--fast-forward-sleep")
+        res.stdout.fnmatch_lines(
+            [
+                "*never sleep audit: 1 call sites of time.sleep*",
+                "*30.00s*3 calls*2 tests*helper.py:3 (wait)*",
+                "*3 passed*",
+            ]
+        )
+
+    def test_as_xdist_worker(self, testdir):
+        testdir.makeconftest(
+            """
+            def pytest_configure(config):
+                config.workerinput = {"never_sleep_whitelist": ["test_a"]}
+                config.workeroutput = {}
+
+            def pytest_unconfigure(config):
+                report = config.workeroutput["never_sleep_report"]
+                print("VIOLATIONS", len(report["violations"]))
+        """
+        )
+        testdir.makepyfile(
+            test_a="""
+            import time
+
+            def test_a(): time.sleep(0.001)
+        """,
+            test_b="""
+            import time
+
+            def test_b(): time.sleep(0.001)
+        """,
+        )
+        res = testdir.runpytest("--disable-sleep", "-s")
+        res.stdout.fnmatch_lines(["*1 failed, 1 passed*", "VIOLATIONS 1"])
+
+    def test_with_asyncio_sleep(self, testdir):
+        testdir.makepyfile(
+            """
+            import asyncio
+            from asyncio import sleep
+
+            import pytest
+
+            def run(coroutine):
+                loop = asyncio.new_event_loop()
+                try:
+                    return loop.run_until_complete(coroutine)
+                finally:
+                    loop.close()
+
+            def test_a(): run(asyncio.sleep(0.01))
+            def test_b(): run(sleep(0.01))
+
+            @pytest.mark.enable_time_sleep
+            def test_c(): run(sleep(0.01))
+
+            def test_d(virtual_time_loop):
+                start = virtual_time_loop.time()
+                virtual_time_loop.run_until_complete(
+                    asyncio.wait_for(asyncio.sleep(3600), timeout=7200)
+                )
+                with pytest.raises(asyncio.TimeoutError):
+                    virtual_time_loop.run_until_complete(
+                        asyncio.wait_for(sleep(3600), timeout=60)
+                    )
+                assert virtual_time_loop.time() - start == 3660
+
+            def test_e(): run(sleep(0))
+        """
+        )
+        true_asyncio_sleep = asyncio.sleep
+        res = testdir.runpytest("--disable-sleep", "-vs")
+        res.stdout.fnmatch_lines(["*2 failed, 3 passed*"])
+        assert asyncio.sleep is true_asyncio_sleep
+
+    def test_with_sleep_target(self, testdir):
+        testdir.makepyfile(
+            """
+            import threading
+            from select import select
+
+            import pytest
+
+            def test_a(): threading.Event().wait(0.01)
+            def test_b(): select([], [], [], 0.01)
+            def test_c(): assert not threading.Event().wait(0)
+
+            @pytest.mark.enable_time_sleep
+            def test_e(): threading.Event().wait(0.01)
+        """
+        )
+        true_event_wait = threading.Event.wait
+        res = testdir.runpytest(
+            "--disable-sleep",
+            "--sleep-target=threading.Event.wait",
+            "--sleep-target=select.select",
+            "-v",
+        )
+        res.stdout.fnmatch_lines(
+            [
+                "*uses `threading.Event.wait`*",
+                "*uses `select.select`*",
+                "*2 failed, 2 passed*",
+            ]
+        )
+        assert threading.Event.wait is true_event_wait
+
+    def test_with_nested_sleep_targets(self, testdir):
+        testdir.makepyfile(
+            wl_helper="""
+            import threading
+
+            def wait(): return threading.Event().wait(0.01)
+        """,
+            test_a="""
+            from wl_helper import wait
+
+            def test_a(): assert not wait()
+        """,
+        )
+        res = testdir.runpytest(
+            "--disable-sleep",
+            "--whitelist=wl_helper",
+            "--sleep-target=threading.Event.wait",
+            "--sleep-target=threading.Condition.wait",
+        )
+        res.stdout.fnmatch_lines(["*1 passed*"])
+
+    def test_with_sleep_target_and_fast_forward_sleep(self, testdir):
+        testdir.makepyfile(
+            """
+            import queue
+            import time
+
+            import pytest
+
+            def test_a():
+                start = time.time()
+                with pytest.raises(queue.Empty):
+                    queue.Queue().get(timeout=3600)
+                assert time.time() - start >= 3600
+        """
+        )
+        res = testdir.runpytest(
+            "--fast-forward-sleep", "--sleep-target=queue.Queue.get"
+        )
+        res.stdout.fnmatch_lines(["*1 passed*"])
+
+    def test_with_condition_wait_target_and_fast_forward_sleep(self, testdir):
+        testdir.makepyfile(
+            """
+            import threading
+            import time
+
+            def test_a():
+                start = time.time()
+                threads = [
+                    threading.Thread(target=time.sleep, args=(seconds,))
+                    for seconds in (10, 20)
+                ]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                assert time.time() - start >= 20
+        """
+        )
+        res = testdir.runpytest(
+            "--fast-forward-sleep", "--sleep-target=threading.Condition.wait"
+        )
+        res.stdout.fnmatch_lines(["*1 passed*"])
+
+    def test_with_not_blocking_sleep_target(self, testdir):
+        testdir.makepyfile(
+            """
+            import queue
+
+            import pytest
+
+            def test_a():
+                with pytest.raises(queue.Empty):
+                    queue.Queue().get(block=False, timeout=0.2)
+        """
+        )
+        res = testdir.runpytest("--disable-sleep", "--sleep-target=queue.Queue.get")
+        res.stdout.fnmatch_lines(["*1 passed*"])
+
+    def test_with_sleep_max_call(self, testdir):
+        testdir.makepyfile(
+            """
+            import time
+
+            def test_a(): time.sleep(0)
+            def test_b(): time.sleep(0.001)
+            def test_c(): time.sleep(0.1)
+        """
+        )
+        res = testdir.runpytest("--disable-sleep", "--sleep-max-call=50ms")
+        res.stdout.fnmatch_lines(["*1 failed, 2 passed*"])
+
+    def test_with_sleep_budget(self, testdir):
+        testdir.makepyfile(
+            """
+            import time
+
+            import pytest
+
+            def test_a(): time.sleep(0.01)
+            def test_b(): time.sleep(0.01); time.sleep(0.05)
+
+            @pytest.mark.sleep_budget("100ms")
+            def test_c(): time.sleep(0.05)
+        """
+        )
+        res = testdir.runpytest("--sleep-budget-per-test=0.03s", "-v")
+        res.stdout.fnmatch_lines(
+            [
+                "*test_b FAILED*",
+                "*SleepBudgetError: Method `*test_b` exceeded sleep budget*",
+                "*1 failed, 2 passed*",
+            ]
+        )
+
+    def test_with_sleep_budget_marker(self, testdir):
+        testdir.makepyfile(
+            """
+            import time
+
+            import pytest
+
+            @pytest.mark.sleep_budget("10ms")
+            def test_a(): time.sleep(0.1)
+        """
+        )
+        res = testdir.runpytest()
+        res.stdout.fnmatch_lines(["*SleepBudgetError*", "*1 failed*"])
+
+    def test_with_sleep_budget_session(self, testdir):
+        testdir.makepyfile(
+            """
+            import time
+
+            def test_a(): time.sleep(0.02)
+            def test_b(): time.sleep(0.02)
+            def test_c(): pass
+        """
+        )
+        res = testdir.runpytest("--sleep-budget-session=30ms")
+        res.stdout.fnmatch_lines(["*session slept*of 0.030s budget*", "*2 passed*"])
+        assert res.ret != 0
+
+    def test_without_disabled_tests_time_sleep_is_not_patched(self, testdir):
+        testdir.makepyfile(
+            """
+            import time
+
+            from pytest_never_sleep.never_sleep import FakeSleep
+
+            def test_a(): assert not isinstance(time.sleep, FakeSleep)
+        """
+        )
+        res = testdir.runpytest()
+        res.stdout.fnmatch_lines(["*1 passed*"])
+
+    def test_with_disabled_test_time_sleep_is_patched_before_first_test(
+        self, testdir
+    ):
+        testdir.makepyfile(
+            """
+            import time
+
+            import pytest
+
+            from pytest_never_sleep.never_sleep import FakeSleep
+
+            def test_a(): assert isinstance(time.sleep, FakeSleep)
+
+            @pytest.mark.disable_time_sleep
+            def test_b(): pass
+        """
+        )
+        res = testdir.runpytest()
+        res.stdout.fnmatch_lines(["*2 passed*"])
+
+    def test_with_sleep_scan(self, testdir):
+        testdir.makepyfile(
+            helpers="""
+            import time
+
+            def wait(): time.sleep(10)
+        """,
+            test_a="""
+            import pytest
+
+            from helpers import wait
+
+            @pytest.fixture
+            def waited(): wait()
+
+            def test_a(): wait()
+            def test_b(waited): pass
+            def test_c(): pass
+        """,
+        )
+        res = testdir.runpytest("--sleep-scan", "--collect-only")
+        res.stdout.fnmatch_lines(
+            [
+                "*never sleep scan: 1 call sites reached by 2 tests*",
+                "*2 tests  helpers.py:3 (wait) time.sleep",
+            ]
+        )
+        res = testdir.runpytest("--deselect-sleepers")
+        res.stdout.fnmatch_lines(["*1 passed, 2 deselected*"])
+
+    def test_with_sleep_scan_and_fast_forward_sleep(self, testdir):
+        testdir.makepyfile(
+            """
+            import datetime
+            import time
+
+            def wait():
+                deadline = time.monotonic() + 10
+                print(time.time(), datetime.datetime.now())
+                time.sleep(10)
+
+            def test_a(): wait()
+            def test_b(): time.time()
+        """
+        )
+        res = testdir.runpytest(
+            "--fast-forward-sleep", "--sleep-scan", "--deselect-sleepers"
+        )
+        res.stdout.fnmatch_lines(
+            [
+                "*never sleep scan: 1 call sites reached by 1 tests*",
+                "*1 passed, 1 deselected*",
+            ]
+        )
+
+    def test_with_sleep_regressions(self, testdir):
+        test_file = """
+            import time
+
+            def test_a(): time.sleep({})
+            def test_b(): time.sleep(0.001)
+        """
+        testdir.makepyfile(test_a=test_file.format(0.001))
+        res = testdir.runpytest("--sleep-regressions")
+        res.stdout.fnmatch_lines(["*2 passed*"])
+        assert res.ret == 0
+
+        testdir.makepyfile(test_a=test_file.format(0.1))
+        res = testdir.runpytest(
+            "--sleep-regressions", "--sleep-regressions-tolerance=50ms"
+        )
+        res.stdout.fnmatch_lines(
+            [
+                "*never sleep regressions: 1 tests sleep longer than before*",
+                "*s -> 0.1*s  test_a.py::test_a",
+                "*2 passed*",
+            ]
+        )
+        assert res.ret != 0
+
+        # regressed test keeps its previous time until fixed
+        res = testdir.runpytest(
+            "--sleep-regressions", "--sleep-regressions-tolerance=50ms"
+        )
+        assert res.ret != 0
+
+    def test_with_sleep_regressions_after_test_stopped_sleeping(self, testdir):
+        test_file = """
+            import time
+
+            def test_a(): time.sleep({})
+        """
+        testdir.makepyfile(test_a=test_file.format(0.1))
+        testdir.runpytest("--sleep-regressions")
+        testdir.makepyfile(test_a="def test_a(): pass")
+        res = testdir.runpytest("--sleep-regressions")
+        assert res.ret == 0
+
+        testdir.makepyfile(test_a=test_file.format(0.09))
+        res = testdir.runpytest(
+            "--sleep-regressions", "--sleep-regressions-tolerance=50ms"
+        )
+        res.stdout.fnmatch_lines(["*s -> 0.09*s  test_a.py::test_a"])
+        assert res.ret != 0
+
+    def test_with_sleep_regressions_after_session_without_patching(self, testdir):
+        testdir.makepyfile(
+            """
+            import time
+
+            def test_a(): time.sleep(0.1)
+        """
+        )
+        res = testdir.runpytest("--sleep-regressions")
+        assert res.ret == 0
+
+        # time.sleep isn't patched, so the profile isn't changed
+        res = testdir.runpytest()
+        assert res.ret == 0
+
+        res = testdir.runpytest(
+            "--sleep-regressions", "--sleep-regressions-tolerance=50ms"
+        )
+        assert res.ret == 0
+
+    def test_with_sleep_schedule(self, testdir):
+        testdir.makepyfile(
+            """
+            import time
+
+            def test_a(): pass
+            def test_b(): time.sleep(0.01)
+            def test_c(): time.sleep(0.05)
+            def test_d(): pass
+        """
+        )
+        testdir.runpytest("--sleep-report-top=1")
+        res = testdir.runpytest("--sleep-schedule", "-v")
+        res.stdout.fnmatch_lines(
+            [
+                "*::test_c PASSED*",
+                "*::test_b PASSED*",
+                "*::test_a PASSED*",
+                "*::test_d PASSED*",
+            ]
+        )
+
+    def test_with_sleep_schedule_as_xdist_worker(self, testdir):
+        testdir.makeconftest(
+            """
+            def pytest_configure(config):
+                config.addinivalue_line("markers", "xdist_group(name): group")
+                config.workerinput = {"workercount": 2}
+                config.workeroutput = {}
+                config.option.dist = "loadgroup"
+
+            def pytest_collection_finish(session):
+                for item in session.items:
+                    marker = item.get_closest_marker("xdist_group")
+                    print("GROUP", item.name, marker.kwargs["name"] if marker else None)
+        """
+        )
+        testdir.makepyfile(
+            """
+            import time
+
+            def test_a(): time.sleep(0.03)
+            def test_b(): time.sleep(0.02)
+            def test_c(): time.sleep(0.02)
+            def test_d(): pass
+        """
+        )
+        # worker doesn't store the profile, it's done by controller
+        profile = testdir.tmpdir.join(".pytest_cache", "v", "never_sleep", "profile")
+        profile.ensure().write(
+            json.dumps(
+                {
+                    "test_with_sleep_schedule_as_xdist_worker.py::test_a": [0.03, 1],
+                    "test_with_sleep_schedule_as_xdist_worker.py::test_b": [0.02, 1],
+                    "test_with_sleep_schedule_as_xdist_worker.py::test_c@g": [0.02, 1],
+                }
+            )
+        )
+        res = testdir.runpytest("--sleep-schedule", "-s")
+        res.stdout.fnmatch_lines(
+            [
+                "GROUP test_a never_sleep_0",
+                "GROUP test_b never_sleep_1",
+                "GROUP test_c never_sleep_1",
+                "GROUP test_d None",
+            ]
+        )
+
+    @pytest.mark.parametrize(
+        "thread_policy, outcomes",
+        [
+            ("main", {"passed": 1, "failed": 1}),
+            ("inherit", {"passed": 1, "failed": 1}),
+            ("allow", {"passed": 2}),
+        ],
+    )
+    def test_with_sleep_thread_policy(self, testdir, thread_policy, outcomes):
+        testdir.makepyfile(
+            """
+            import threading
+            import time
+
+            import pytest
+
+            def sleep_in_thread():
+                errors = []
+
+                def target():
+                    try:
+                        time.sleep(0.01)
+                    except BaseException as e:
+                        errors.append(e)
+
+                thread = threading.Thread(target=target)
+                thread.start()
+                thread.join()
+                if errors:
+                    raise errors[0]
+
+            @pytest.mark.disable_time_sleep
+            def test_disabled():
+                sleep_in_thread()
+
+            def test_enabled():
+                sleep_in_thread()
+        """
+        )
+        res = testdir.runpytest("--sleep-thread-policy={}".format(thread_policy))
+        res.assert_outcomes(**outcomes)
+
+    def test_with_sleep_scale(self, testdir):
+        testdir.makepyfile(
+            """
+            import time
+
+            import pytest
+
+            def test_a():
+                start = time.time()
+                time.sleep(1)
+                assert time.time() - start < 0.5
+
+            @pytest.mark.sleep_scale(0)
+            def test_b():
+                start = time.time()
+                time.sleep(1)
+                assert time.time() - start < 0.5
+        """
+        )
+        res = testdir.runpytest("--sleep-scale=0.05", "--sleep-scale-floor=10ms")
+        res.stdout.fnmatch_lines(
+            ["*never sleep: scaled away 1.94s of time.sleep in 2 tests*", "*2 passed*"]
+        )
+
+    def test_with_sleep_scale_marker(self, testdir):
+        testdir.makepyfile(
+            """
+            import time
+
+            import pytest
+
+            @pytest.mark.sleep_scale(0.01)
+            def test_a(): time.sleep(1)
+            def test_b(): time.sleep(0.01)
+        """
+        )
+        res = testdir.runpytest()
+        res.stdout.fnmatch_lines(
+            ["*never sleep: scaled away 0.99s of time.sleep in 1 tests*", "*2 passed*"]
+        )
+
+    def test_with_fast_forward_sleep_in_threads(self, testdir):
+        testdir.makepyfile(
+            """
+            import threading
+            import time
+
+            def test_producer_and_consumer():
+                start = time.monotonic()
+                events = []
+
+                def worker(name, interval):
+                    for _ in range(3):
+                        time.sleep(interval)
+                        events.append((round(time.monotonic() - start), name))
+
+                threads = [
+                    threading.Thread(target=worker, args=("consumer", 5)),
+                    threading.Thread(target=worker, args=("producer", 3)),
+                ]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                assert events == [
+                    (3, "producer"),
+                    (5, "consumer"),
+                    (6, "producer"),
+                    (9, "producer"),
+                    (10, "consumer"),
+                    (15, "consumer"),
+                ]
+        """
+        )
+        res = testdir.runpytest("--fast-forward-sleep")
+        res.stdout.fnmatch_lines(["*1 passed*"])
+
+    def test_with_on_call_hook(self, testdir):
+        testdir.makeconftest(
+            """
+            def pytest_never_sleep_on_call(item, target, seconds, decision):
+                print("CALL", item.name, target, seconds, decision)
+        """
+        )
+        testdir.makepyfile(
+            """
+            import time
+
+            import pytest
+
+            def test_a(): time.sleep(0.01)
+
+            @pytest.mark.disable_time_sleep
+            def test_b(): time.sleep(1)
+        """
+        )
+        res = testdir.runpytest("-s")
+        res.stdout.fnmatch_lines(
+            [
+                "*CALL test_a time.sleep 0.01 allowed*",
+                "*CALL test_b time.sleep 1 denied*",
+                "*1 failed, 1 passed*",
+            ]
+        )
+
+    def test_with_sleep_listener(self, testdir):
+        testdir.makepyfile(
+            """
+            import time
+
+            import pytest
+
+            from pytest_never_sleep.plugin import add_sleep_listener, remove_sleep_listener
+
+            calls = []
+
+            def listener(item, frame, target, seconds, decision):
+                calls.append((item.name, frame.f_code.co_name, seconds, decision))
+
+            @pytest.fixture
+            def listen():
+                add_sleep_listener(listener)
+                yield
+                remove_sleep_listener(listener)
+
+            @pytest.mark.disable_time_sleep
+            def test_a(listen):
+                with pytest.raises(Exception):
+                    time.sleep(1)
+                assert calls == [("test_a", "test_a", 1, "denied")]
+        """
+        )
+        res = testdir.runpytest()
+        res.stdout.fnmatch_lines(["*1 passed*"])
+
+    def test_with_sleep_subprocess(self, testdir):
+        testdir.makepyfile(
+            """
+            import subprocess
+            import sys
+
+            import pytest
+
+            def run_child(code):
+                return subprocess.call([sys.executable, "-c", code])
+
+            def test_allowed():
+                assert run_child("import time; time.sleep(0.2)") == 0
+
+            @pytest.mark.disable_time_sleep
+            def test_not_allowed():
+                run_child("import time; time.sleep(0.2)")
+        """
+        )
+        res = testdir.runpytest(
+            "--sleep-subprocess", "--sleep-report-top=2", "-W", "error"
+        )
+        assert "PluggyTeardownRaisedWarning" not in res.stdout.str()
+        res.stdout.fnmatch_lines(
+            [
+                "*TimeSleepUsageError: 1 not allowed calls of time.sleep in child processes*",
+                "*never sleep: top 2 sleepiest tests*",
+                "*0.2*s      1 calls  test_with_sleep_subprocess.py::test_allowed*",
+                "*1 not allowed calls of time.sleep in 1 tests*",
+                "*1 failed, 1 passed*",
+            ]
+        )
+
+    @pytest.mark.skipif(
+        not hasattr(os, "fork"), reason="multiprocessing fork isn't available"
+    )
+    def test_with_sleep_subprocess_and_multiprocessing_fork(self, testdir):
+        testdir.makepyfile(
+            """
+            import multiprocessing
+            import time
+
+            def work(seconds):
+                time.sleep(seconds)
+
+            def test_pool():
+                context = multiprocessing.get_context("fork")
+                with context.Pool(2) as pool:
+                    pool.map(work, [0.1, 0.1])
+        """
+        )
+        res = testdir.runpytest("--sleep-subprocess", "--sleep-report-top=1")
+        res.stdout.fnmatch_lines(
+            [
+                "*0.2*s      2 calls  test_with_sleep_subprocess_and_multiprocessing_fork.py::test_pool*",
+                "*1 passed*",
+            ]
+        )
+
+    def test_with_sleep_idle_ratio(self, testdir):
+        testdir.makepyfile(
+            """
+            import threading
+            import time
+
+            def test_wait(): threading.Event().wait(0.2)
+            def test_sleep(): time.sleep(0.2)
+            def test_fast(): pass
+        """
+        )
+        res = testdir.runpytest("--sleep-idle-ratio=0.5", "--sleep-idle-min=50ms")
+        res.stdout.fnmatch_lines(
+            [
+                "*never sleep: 1 idle tests, waits which can't be patched*",
+                "*0.2*s idle*test_with_sleep_idle_ratio.py::test_wait",
+                "*3 passed*",
+            ]
+        )
+        assert "::test_sleep" not in res.stdout.str()
+
+    def test_with_aliased_time_sleep(self, testdir):
+        testdir.makepyfile(
+            helpers="""
+            import time
+            from time import sleep as _sleep
+
+            pause = time.sleep
+
+            def retry():
+                _sleep(1)
+
+            def wait():
+                pause(1)
+        """,
+            test_aliases="""
+            import pytest
+
+            from helpers import retry, wait
+
+            @pytest.mark.disable_time_sleep
+            @pytest.mark.parametrize("function", [retry, wait])
+            def test_alias(function):
+                function()
+        """,
+        )
+        res = testdir.runpytest()
+        res.stdout.fnmatch_lines(
+            [
+                "*Method `retry` uses `time.sleep`*",
+                "*Method `wait` uses `time.sleep`*",
+                "*2 failed*",
+            ]
+        )
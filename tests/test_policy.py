@@ -0,0 +1,95 @@
+import sys
+import threading
+
+import pytest
+
+from pytest_never_sleep.never_sleep import (
+    FakeSleep,
+    using_fake_time_sleep,
+    using_real_time_sleep,
+)
+from pytest_never_sleep.policy import (
+    THREAD_POLICY_ALLOW,
+    THREAD_POLICY_DEFAULT,
+    THREAD_POLICY_INHERIT,
+    THREAD_POLICY_MAIN,
+    ContextPolicy,
+    inheriting_thread_start,
+    is_main_thread,
+)
+
+
+def run_in_thread(function):
+    result = []
+    thread = threading.Thread(target=lambda: result.append(function()))
+    thread.start()
+    thread.join()
+    return result[0]
+
+
+def test_is_main_thread():
+    assert is_main_thread()
+    assert not run_in_thread(is_main_thread)
+
+
+def test_context_policy_set_and_reset():
+    policy = ContextPolicy("never_sleep_test_policy")
+    assert policy.get() is None
+    token = policy.set(False)
+    assert policy.get() is False
+    assert run_in_thread(policy.get) is None
+    policy.reset(token)
+    assert policy.get() is None
+
+
+@pytest.mark.parametrize(
+    "thread_policy, expected",
+    [
+        (THREAD_POLICY_MAIN, False),
+        (THREAD_POLICY_ALLOW, True),
+        (THREAD_POLICY_DEFAULT, True),
+    ],
+)
+def test_thread_policy(thread_policy, expected):
+    fake = FakeSleep(allow_time_sleep=True)
+    fake.thread_policy = thread_policy
+    with using_fake_time_sleep(fake):
+        assert fake.is_allow_time_sleep_by_default is False
+        policy = run_in_thread(lambda: fake.is_allow_time_sleep_by_default)
+    assert policy is expected
+    assert fake.is_allow_time_sleep_by_default is True
+
+
+def test_main_thread_policy_is_restored():
+    fake = FakeSleep(allow_time_sleep=True)
+    with using_fake_time_sleep(fake):
+        with using_real_time_sleep(fake):
+            assert run_in_thread(lambda: fake.is_allow_time_sleep_by_default)
+        assert not run_in_thread(lambda: fake.is_allow_time_sleep_by_default)
+    assert run_in_thread(lambda: fake.is_allow_time_sleep_by_default)
+
+
+def test_thread_own_policy_is_local():
+    fake = FakeSleep(allow_time_sleep=True)
+
+    def deny():
+        with using_fake_time_sleep(fake):
+            return fake.is_allow_time_sleep_by_default
+
+    assert run_in_thread(deny) is False
+    assert fake.is_allow_time_sleep_by_default is True
+
+
+@pytest.mark.skipif(sys.version_info < (3, 7), reason="requires contextvars")
+def test_inheriting_thread_start():
+    fake = FakeSleep(allow_time_sleep=True)
+    fake.thread_policy = THREAD_POLICY_INHERIT
+    result = []
+    with using_fake_time_sleep(fake):
+        thread = threading.Thread(
+            target=lambda: result.append(fake.is_allow_time_sleep_by_default)
+        )
+        inheriting_thread_start(thread)
+    thread.join()
+    assert result == [False]
+    assert fake.is_allow_time_sleep_by_default is True
@@ -0,0 +1,21 @@
+import sys
+
+from pytest_never_sleep.never_sleep import FakeSleep
+from pytest_never_sleep.report import get_sleep_report, merge_sleep_report
+from pytest_never_sleep.stats import SleepAudit
+
+
+def test_merge_sleep_report():
+    worker = FakeSleep()
+    worker.audit = SleepAudit()
+    worker.stats.start("test_a")
+    worker.stats.record(1.0)
+    worker.audit.record(sys._getframe(), 2.0, "test_a")
+    worker.stats.stop()
+
+    controller = FakeSleep()
+    merge_sleep_report(controller, get_sleep_report(worker))
+    assert controller.stats.tests == {"test_a": [1.0, 1]}
+    assert controller.audit.report() == worker.audit.report()
+    assert controller.idle is None
+    assert "scan" not in get_sleep_report(controller)
@@ -0,0 +1,130 @@
+import textwrap
+
+import pytest
+
+from pytest_never_sleep.scan import (
+    SleepScanner,
+    get_binding,
+    resolve_relative_name,
+    scan_source,
+)
+
+TARGETS = frozenset(["time.sleep", "asyncio.sleep"])
+
+
+def test_scan_source_finds_all_import_forms():
+    source = textwrap.dedent(
+        """
+        import time
+        import time as t
+        from time import sleep
+        from time import sleep as nap
+
+        def a(): time.sleep(1)
+        def b(): t.sleep(1)
+        def c(): sleep(1)
+        def d(): nap(1)
+
+        class Helper(object):
+            def wait(self): self.other()
+            def other(self): pass
+
+        def e():
+            import asyncio
+            return asyncio.sleep(1)
+
+        def f(): a(); other.sleep(1)
+        """
+    )
+    result = scan_source(source, "module.py", TARGETS)
+    assert result["sites"] == [
+        [7, "a", "time.sleep"],
+        [8, "b", "time.sleep"],
+        [9, "c", "time.sleep"],
+        [10, "d", "time.sleep"],
+        [18, "e", "asyncio.sleep"],
+    ]
+    assert result["calls"] == {"Helper.wait": ["self.other"], "f": ["a", "other.sleep"]}
+
+
+def test_get_binding():
+    imports = {"<module>": {"wait": ["..helpers", "wait"], "h": [".", "helpers"]}}
+    assert get_binding(imports, "test_a", "wait") == "..helpers.wait"
+    assert get_binding(imports, "test_a", "h.wait") == ".helpers.wait"
+    assert get_binding(imports, "test_a", "unknown") is None
+
+
+@pytest.mark.parametrize(
+    "name, module_name, is_package, expected",
+    [
+        ("helpers.wait", "tests.test_a", False, "helpers.wait"),
+        (".helpers.wait", "tests.test_a", False, "tests.helpers.wait"),
+        ("..helpers.wait", "tests.unit.test_a", False, "tests.helpers.wait"),
+        (".helpers", "tests", True, "tests.helpers"),
+    ],
+)
+def test_resolve_relative_name(name, module_name, is_package, expected):
+    assert resolve_relative_name(name, module_name, is_package) == expected
+
+
+class TestSleepScanner(object):
+    @pytest.fixture
+    def package(self, testdir, monkeypatch):
+        testdir.makepyfile(
+            never_sleep_scan_helpers="""
+            from time import sleep
+
+            def wait(): sleep(1)
+            def poll(): wait()
+        """,
+            never_sleep_scan_tests="""
+            import never_sleep_scan_helpers as helpers
+            from never_sleep_scan_helpers import poll
+
+            def test_a(): poll()
+            def test_b(): helpers.wait()
+            def test_c(): pass
+        """,
+        )
+        monkeypatch.syspath_prepend(str(testdir.tmpdir))
+        return testdir.tmpdir
+
+    def test_get_sites(self, package):
+        scanner = SleepScanner(TARGETS, str(package))
+        path = str(package.join("never_sleep_scan_helpers.py"))
+        site = (path, 3, "wait", "time.sleep")
+        assert scanner.get_sites("never_sleep_scan_tests", "test_a") == {site}
+        assert scanner.get_sites("never_sleep_scan_tests", "test_b") == {site}
+        assert scanner.get_sites("never_sleep_scan_tests", "test_c") == set()
+        assert scanner.get_all_sites() == [site]
+
+    def test_cache_is_reused_until_file_changed(self, package):
+        scanner = SleepScanner(TARGETS, str(package))
+        scanner.get_sites("never_sleep_scan_tests", "test_a")
+        assert scanner.is_cache_changed
+        assert len(scanner.cache) == 2
+
+        scanner = SleepScanner(TARGETS, str(package), cache=scanner.cache)
+        scanner.get_sites("never_sleep_scan_tests", "test_a")
+        assert not scanner.is_cache_changed
+
+        package.join("never_sleep_scan_helpers.py").write("def poll(): pass\n", "a")
+        scanner = SleepScanner(TARGETS, str(package), cache=scanner.cache)
+        scanner.get_sites("never_sleep_scan_tests", "test_a")
+        assert scanner.is_cache_changed
+
+    def test_get_sites_of_recursion(self, testdir, monkeypatch):
+        testdir.makepyfile(
+            never_sleep_scan_cycle="""
+            import time
+
+            def a(): time.sleep(1); b()
+            def b(): a()
+        """
+        )
+        monkeypatch.syspath_prepend(str(testdir.tmpdir))
+        scanner = SleepScanner(TARGETS, str(testdir.tmpdir))
+        path = str(testdir.tmpdir.join("never_sleep_scan_cycle.py"))
+        site = (path, 3, "a", "time.sleep")
+        assert scanner.get_sites("never_sleep_scan_cycle", "a") == {site}
+        assert scanner.get_sites("never_sleep_scan_cycle", "b") == {site}
@@ -0,0 +1,109 @@
+import sys
+
+from pytest_never_sleep.stats import (
+    IdleDetector,
+    SleepAudit,
+    SleepStats,
+    find_regressions,
+)
+
+
+class TestSleepStats(object):
+    def test_records_only_inside_test(self):
+        stats = SleepStats()
+        stats.record(1.0)
+        stats.start("test_a")
+        stats.record(1.0)
+        stats.record(0.5)
+        stats.stop()
+        assert stats.tests == {"test_a": [1.5, 2]}
+
+    def test_merge(self):
+        worker = SleepStats()
+        worker.start("test_a")
+        worker.record(1.0)
+        worker.record_violation()
+        worker.record_scaled(2.0)
+        worker.stop()
+
+        stats = SleepStats()
+        stats.start("test_a")
+        stats.record(0.5)
+        stats.stop()
+        stats.merge(worker.to_dict())
+        assert stats.tests == {"test_a": [1.5, 2]}
+        assert stats.violations == {"test_a": 1}
+        assert stats.scaled == {"test_a": 2.0}
+        assert not stats.is_recording
+
+        worker.is_recording = True
+        stats.merge(worker.to_dict())
+        assert stats.is_recording
+
+
+class TestSleepAudit(object):
+    def test_aggregates_events_when_buffer_is_full(self):
+        audit = SleepAudit(capacity=2)
+        frame = sys._getframe()
+        for nodeid in ("test_a", "test_b", "test_a", None, "test_a"):
+            audit.record(frame, 0.5, nodeid)
+
+        report = audit.report()
+        assert len(report) == 1
+        assert report[0]["path"] == __file__.replace(".pyc", ".py")
+        assert report[0]["name"] == "test_aggregates_events_when_buffer_is_full"
+        assert report[0]["calls"] == 5
+        assert report[0]["seconds"] == 2.5
+        assert report[0]["tests"] == ["test_a", "test_b"]
+
+    def test_merge(self):
+        def sleep(audit, nodeid):
+            audit.record(sys._getframe(), 1.0, nodeid)
+
+        worker, audit = SleepAudit(), SleepAudit()
+        sleep(worker, "test_b")
+        sleep(audit, "test_a")
+        audit.merge(worker.report())
+
+        report = audit.report()
+        assert len(report) == 1
+        assert report[0]["calls"] == 2
+        assert report[0]["tests"] == ["test_a", "test_b"]
+
+
+def test_find_regressions():
+    profile = {
+        "test_a": [1.0, 1],
+        "test_b": [0.5, 1],
+        "test_c": [2.0, 2],
+        "test_d": [0.05, 1],
+    }
+    baseline = {"test_a": [1.0, 1], "test_b": [0.1, 1], "test_c": [0.5, 1]}
+    assert find_regressions(profile, baseline, 0.1) == [
+        ("test_c", 0.5, 2.0),
+        ("test_b", 0.1, 0.5),
+    ]
+
+
+class TestIdleDetector(object):
+    def test_reports_waits_outside_of_sleep(self):
+        detector = IdleDetector(0.5, min_seconds=0.1)
+        detector.start(0.0)
+        detector.stop("test_wait", 2.0, 0.0)
+        detector.start(0.0)
+        detector.stop("test_sleep", 2.0, 1.9)
+        detector.start(0.0)
+        detector.stop("test_short", 0.05, 0.0)
+        assert list(detector.tests) == ["test_wait"]
+        wall, cpu, slept = detector.tests["test_wait"]
+        assert wall == 2.0
+        assert 0 <= cpu < 1
+        assert slept == 0.0
+
+    def test_merge(self):
+        worker = IdleDetector(0.5)
+        worker.tests = {"test_a": [2.0, 0.1, 0.0], "test_b": [1.0, 0.0, 0.0]}
+        detector = IdleDetector(0.5)
+        detector.merge(worker.report())
+        assert detector.tests == worker.tests
+        assert [record[0] for record in detector.top()] == ["test_a", "test_b"]
@@ -0,0 +1,63 @@
+import threading
+
+from pytest_never_sleep.ledger import PatchLedger
+from pytest_never_sleep.targets import Target, TargetRegistry
+
+
+class TestTarget(object):
+    def test_resolve_function(self):
+        target = Target("select.select")
+        assert target.resolve()
+        assert target.is_function
+        assert (target.timeout_position, target.timeout_name) == (3, "timeout")
+
+    def test_resolve_method(self):
+        target = Target("threading.Event.wait")
+        assert target.resolve()
+        assert not target.is_function
+        assert target.owner is threading.Event
+
+    def test_resolve_unknown(self):
+        assert not Target("never_sleep_unknown_module.wait").resolve()
+        assert not Target("threading.UnknownClass.wait").resolve()
+
+    def test_get_and_replace_timeout(self):
+        target = Target("threading.Event.wait")
+        event = threading.Event()
+        assert target.get_timeout((event,), {}) is None
+        assert target.get_timeout((event, 5), {}) == 5
+        assert target.get_timeout((event,), {"timeout": 3}) == 3
+        assert target.replace_timeout((event, 5), {}, 0) == ((event, 0), {})
+        assert target.replace_timeout((event,), {"timeout": 3}, 0) == (
+            (event,),
+            {"timeout": 0},
+        )
+
+    def test_get_timeout_of_not_blocking_call(self):
+        target = Target("queue.Queue.get")
+        queue = object()
+        assert target.get_timeout((queue, True, 0.2), {}) == 0.2
+        assert target.get_timeout((queue,), {"timeout": 0.2}) == 0.2
+        assert target.get_timeout((queue, False, 0.2), {}) is None
+        assert target.get_timeout((queue,), {"block": False, "timeout": 0.2}) is None
+
+
+class TestTargetRegistry(object):
+    def test_patch_and_unpatch_owners(self):
+        target = Target("threading.Event.wait")
+        target.resolve()
+        registry = TargetRegistry()
+
+        def fake(self, timeout=None):
+            return "fake"
+
+        registry.add(target, fake)
+        assert registry.names == ()
+        ledger = PatchLedger()
+        registry.patch_owners(ledger)
+        try:
+            assert threading.Event().wait(1) == "fake"
+            assert registry.get_original(threading.Event.wait) is target.original
+        finally:
+            ledger.restore()
+        assert threading.Event.wait is target.original
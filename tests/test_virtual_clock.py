@@ -0,0 +1,77 @@
+import threading
+import time
+
+from pytest_never_sleep.virtual_clock import VirtualClock, VirtualScheduler
+
+
+def run_sleepers(scheduler, intervals, count):
+    events = []
+    lock = threading.Lock()
+
+    def sleeper(name, interval):
+        for _ in range(count):
+            scheduler.sleep(interval)
+            with lock:
+                events.append((scheduler.clock.offset, name))
+
+    threads = [
+        threading.Thread(target=sleeper, args=(name, interval))
+        for name, interval in sorted(intervals.items())
+    ]
+    for thread in threads:
+        scheduler.register(thread)
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return events
+
+
+def test_single_thread_advances_clock():
+    scheduler = VirtualScheduler(VirtualClock())
+    scheduler.sleep(10)
+    scheduler.sleep(0.5)
+    assert scheduler.clock.offset == 10.5
+
+
+def test_threads_are_woken_in_deadline_order():
+    scheduler = VirtualScheduler(VirtualClock(), grace=1)
+    start = time.time()
+    events = run_sleepers(scheduler, {"consumer": 5, "producer": 3}, count=3)
+    assert time.time() - start < 1
+    assert events == [
+        (3, "producer"),
+        (5, "consumer"),
+        (6, "producer"),
+        (9, "producer"),
+        (10, "consumer"),
+        (15, "consumer"),
+    ]
+
+
+def test_busy_participant_is_waited_only_grace():
+    scheduler = VirtualScheduler(VirtualClock(), grace=0.01)
+    busy = threading.Event()
+
+    def participant():
+        scheduler.sleep(1)
+        busy.wait(5)
+
+    thread = threading.Thread(target=participant)
+    scheduler.register(threading.current_thread())
+    scheduler.register(thread)
+    thread.start()
+    scheduler.sleep(2)
+    assert scheduler.clock.offset == 2
+    busy.set()
+    thread.join()
+
+
+def test_reset_forgets_participants():
+    scheduler = VirtualScheduler(VirtualClock(), grace=5)
+    scheduler.sleep(1)
+    scheduler.reset()
+    start = time.time()
+    events = run_sleepers(scheduler, {"a": 1, "b": 2}, count=1)
+    assert time.time() - start < 1
+    assert events == [(2, "a"), (3, "b")]
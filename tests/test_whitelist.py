@@ -0,0 +1,66 @@
+import os
+
+import pytest
+
+from pytest_never_sleep.whitelist import (
+    Whitelist,
+    build_prefix_regex,
+    is_path_pattern,
+    resolve_pattern,
+)
+
+
+@pytest.mark.parametrize(
+    "pattern, expected",
+    [
+        ("tests.helpers", False),
+        ("tests/helpers", True),
+        ("helpers.py", True),
+        ("*vendor*", True),
+    ],
+)
+def test_is_path_pattern(pattern, expected):
+    assert is_path_pattern(pattern) is expected
+
+
+def test_resolve_pattern():
+    assert resolve_pattern("tests.helpers", "/root") == "tests.helpers"
+    assert resolve_pattern("scripts/", "/root") == "/root/scripts"
+    assert resolve_pattern("/opt/scripts", "/root") == "/opt/scripts"
+    assert resolve_pattern("*/vendor/*", "/root") == "*/vendor/*"
+
+
+def test_build_prefix_regex():
+    assert build_prefix_regex([]) is None
+    assert build_prefix_regex(["tests.a", "tests.b", "tests.a.b"]) == r"tests\.(?:a|b)"
+    assert build_prefix_regex(["tests.a.b", "tests"]) == "tests"
+
+
+class TestWhitelist(object):
+    def test_empty(self):
+        whitelist = Whitelist()
+        assert not whitelist
+        assert not whitelist.match("tests", "/root/tests/test_a.py")
+
+    def test_match_module_prefix(self):
+        whitelist = Whitelist(["tests.helpers", "other"])
+        assert whitelist.match_module("tests.helpers.wait")
+        assert whitelist.match_module("other")
+        assert not whitelist.match_module("tests.test_a")
+
+    def test_match_path(self):
+        whitelist = Whitelist(["/root/scripts", "/root/run.py", "*/vendor/*.py"])
+        assert whitelist.match_path("/root/scripts/deploy.py")
+        assert not whitelist.match_path("/root/scripts_other/deploy.py")
+        assert whitelist.match_path("/root/run.py")
+        assert whitelist.match_path("/usr/lib/vendor/lib.py")
+        assert not whitelist.match_path("/root/tests/test_a.py")
+
+    def test_many_patterns(self):
+        whitelist = Whitelist(["package.module_{}".format(i) for i in range(500)])
+        assert whitelist.match_module("package.module_499.sub")
+        assert not whitelist.match_module("package.module_x")
+
+    def test_relative_path_is_resolved_from_cwd(self):
+        whitelist = Whitelist(["scripts/"])
+        assert whitelist.match_path(os.path.join(os.getcwd(), "scripts", "a.py"))